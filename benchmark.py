@@ -0,0 +1,308 @@
+import argparse
+import hashlib
+import http.server
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit, parse_qsl
+
+import main
+
+
+# Local stand-in for the GitHub releases API and its asset CDN, so fetch,
+# download and install can be timed without touching the network.
+class BenchmarkServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, assets, pages=1, releases_per_page=10, ranges=True, latency=0.0, bandwidth=0):
+        super().__init__(('127.0.0.1', 0), BenchmarkHandler)
+        self.assets = assets
+        self.pages = pages
+        self.releases_per_page = releases_per_page
+        self.ranges = ranges
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.request_count = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    @property
+    def api_url(self):
+        return f"{self.base_url}/repos/niXman/mingw-builds-binaries/releases"
+
+    def release_page(self, page):
+        names = sorted(self.assets)
+        releases = []
+        for index in range(self.releases_per_page):
+            number = (page - 1) * self.releases_per_page + index
+            assets = []
+            if number == 0:
+                for name in names:
+                    assets.append({
+                        'name': name,
+                        'size': len(self.assets[name]),
+                        'updated_at': '2024-01-01T00:00:00Z',
+                        'browser_download_url': f"{self.base_url}/assets/{name}",
+                        'digest': 'sha256:' + hashlib.sha256(self.assets[name]).hexdigest(),
+                    })
+            else:
+                for arch in ('x86_64', 'i686'):
+                    assets.append({
+                        'name': f"{arch}-{number}.1.0-release-posix-seh-ucrt-rt_v11-rev{number}.7z",
+                        'size': 1,
+                        'updated_at': '2024-01-01T00:00:00Z',
+                        'browser_download_url': f"{self.base_url}/assets/missing-{number}.7z",
+                    })
+            releases.append({'tag_name': f"v{number}", 'assets': assets})
+        return releases
+
+
+class BenchmarkHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.request_count += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        parts = urlsplit(self.path)
+        if parts.path.endswith('/releases'):
+            self.send_releases(int(dict(parse_qsl(parts.query)).get('page', 1)))
+        elif parts.path.startswith('/assets/'):
+            self.send_asset(parts.path[len('/assets/'):])
+        else:
+            self.send_error(404)
+
+    def send_releases(self, page):
+        body = json.dumps(self.server.release_page(page)).encode('utf-8')
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('ETag', etag)
+        links = []
+        base = self.server.api_url
+        if page < self.server.pages:
+            links.append(f'<{base}?per_page=100&page={page + 1}>; rel="next"')
+            links.append(f'<{base}?per_page=100&page={self.server.pages}>; rel="last"')
+        if links:
+            self.send_header('Link', ', '.join(links))
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_asset(self, name):
+        data = self.server.assets.get(name)
+        if data is None:
+            self.send_error(404)
+            return
+        start, end = 0, len(data) - 1
+        match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        if match and self.server.ranges:
+            start = int(match.group(1))
+            end = min(int(match.group(2)) if match.group(2) else end, end)
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{end}/{len(data)}")
+        else:
+            self.send_response(200)
+        if self.server.ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        self.write_throttled(memoryview(data)[start:end + 1])
+
+    def write_throttled(self, view):
+        chunk_size = 64 * 1024
+        started = time.monotonic()
+        for offset in range(0, len(view), chunk_size):
+            try:
+                self.wfile.write(view[offset:offset + chunk_size])
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            if self.server.bandwidth:
+                ahead = (offset + chunk_size) / self.server.bandwidth - (time.monotonic() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+
+def make_archive(work_dir, name, size, files):
+    # A toolchain-shaped archive: many small headers plus one large binary of
+    # random (incompressible) data that makes up the requested size.
+    import py7zr
+
+    tree = os.path.join(work_dir, 'tree', 'mingw64')
+    header_size = 2048
+    for index in range(files):
+        path = os.path.join(tree, 'include', f"d{index % 50}", f"h{index}.h")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write((f"#define H{index} {index}\n" * header_size)[:header_size])
+    os.makedirs(os.path.join(tree, 'bin'), exist_ok=True)
+    with open(os.path.join(tree, 'bin', 'cc1plus.exe'), 'wb') as f:
+        f.write(os.urandom(max(size - files * header_size, 1)))
+    archive_path = os.path.join(work_dir, name)
+    with py7zr.SevenZipFile(archive_path, 'w') as archive:
+        archive.writeall(tree, 'mingw64')
+    shutil.rmtree(os.path.join(work_dir, 'tree'))
+    with open(archive_path, 'rb') as f:
+        return f.read()
+
+
+def peak_rss():
+    try:
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == 'darwin' else usage * 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset
+    except (ImportError, AttributeError):
+        return None
+
+
+def summarize(samples, size=None):
+    ordered = sorted(samples)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    result = {
+        'runs': len(samples),
+        'mean_s': statistics.mean(samples),
+        'p50_s': percentile(50),
+        'p90_s': percentile(90),
+        'p99_s': percentile(99),
+    }
+    if size:
+        result['throughput_mib_s'] = size / percentile(50) / 1048576
+    return result
+
+
+def bench_fetch(server, work_dir, repeat, tracer):
+    session = main.create_session()
+    cold, warm = [], []
+    assets = []
+    for run in range(repeat):
+        cache = main.ReleaseIndexCache(os.path.join(work_dir, f"releases-{run}.json"))
+        client = main.ReleaseClient(session, cache, tracer=tracer)
+        started = time.perf_counter()
+        with tracer.span('fetch_versions', cached=False):
+            assets, _ = client.fetch(server.api_url)
+        cold.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        with tracer.span('fetch_versions', cached=True):
+            client.fetch(server.api_url)
+        warm.append(time.perf_counter() - started)
+    return {'assets': len(assets), 'pages': server.pages, 'cold': summarize(cold), 'conditional': summarize(warm)}
+
+
+def bench_download(server, work_dir, name, repeat, segments, tracer):
+    session = main.create_session(segments)
+    samples = []
+    size = len(server.assets[name])
+    for run in range(repeat):
+        dest = os.path.join(work_dir, f"download-{run}-{name}")
+        downloader = main.SegmentedDownloader(session, segments=segments, tracer=tracer)
+        started = time.perf_counter()
+        with tracer.span('download', file=name):
+            downloader.download(f"{server.base_url}/assets/{name}", dest)
+        samples.append(time.perf_counter() - started)
+        if os.path.getsize(dest) != size:
+            raise Exception(f"Downloaded size mismatch for {name}")
+        os.remove(dest)
+    return dict(summarize(samples, size), segments=segments, bytes=size)
+
+
+def bench_install(archive_path, work_dir, repeat, extractor, tracer):
+    samples = []
+    backend = None
+    for run in range(repeat):
+        root = os.path.join(work_dir, f"install-{run}")
+        installer = main.MinGWInstaller(root, extractor=extractor, delta_upgrades=False,
+                                        log=lambda message: None, tracer=tracer)
+        started = time.perf_counter()
+        with tracer.span('install', file=os.path.basename(archive_path)):
+            installer.install(archive_path)
+        samples.append(time.perf_counter() - started)
+        backend = installer.get_extractor().name
+        shutil.rmtree(root, ignore_errors=True)
+    return dict(summarize(samples, os.path.getsize(archive_path)), extractor=backend)
+
+
+def main_benchmark(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark fetch, download and install against a local server")
+    parser.add_argument('--asset-mb', type=float, default=32, help="size of the synthetic archive")
+    parser.add_argument('--files', type=int, default=2000, help="number of small files in the archive")
+    parser.add_argument('--pages', type=int, default=5, help="pages of release history to serve")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--segments', type=int, default=8)
+    parser.add_argument('--no-range', action='store_true', help="serve assets without Range support")
+    parser.add_argument('--latency-ms', type=float, default=0, help="latency added to every request")
+    parser.add_argument('--bandwidth-mbps', type=float, default=0, help="per-connection bandwidth cap")
+    parser.add_argument('--extractor', default='auto')
+    parser.add_argument('--skip', action='append', default=[], choices=['fetch', 'download', 'install'])
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    parser.add_argument('--trace', default='', help="append per-phase spans to this JSON lines file")
+    parser.add_argument('--summary', action='store_true', help="print a phase summary table after each operation")
+    args = parser.parse_args(argv)
+    tracer = main.Tracer(args.trace, log=(lambda text: print(text, file=sys.stderr)) if args.summary else None)
+
+    work_dir = tempfile.mkdtemp(prefix='mingw-bench-')
+    try:
+        name = 'x86_64-13.2.0-release-posix-seh-ucrt-rt_v11-rev1.7z'
+        data = make_archive(work_dir, name, int(args.asset_mb * 1048576), args.files)
+        server = BenchmarkServer({name: data}, pages=args.pages, ranges=not args.no_range,
+                                 latency=args.latency_ms / 1000,
+                                 bandwidth=int(args.bandwidth_mbps * 1000000 / 8))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        report = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'config': vars(args),
+        }
+        if 'fetch' not in args.skip:
+            report['fetch'] = bench_fetch(server, work_dir, args.repeat, tracer)
+        if 'download' not in args.skip:
+            report['download'] = bench_download(server, work_dir, name, args.repeat, args.segments, tracer)
+        if 'install' not in args.skip:
+            archive_path = os.path.join(work_dir, name)
+            report['install'] = bench_install(archive_path, work_dir, args.repeat, args.extractor, tracer)
+        report['requests_served'] = server.request_count
+        report['peak_rss_bytes'] = peak_rss()
+        server.shutdown()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_benchmark())
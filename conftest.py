@@ -0,0 +1,40 @@
+import threading
+
+import pytest
+
+from benchmark import BenchmarkServer
+
+
+@pytest.fixture
+def server():
+    # Starts benchmark.BenchmarkServer instances (a local stand-in for the GitHub
+    # API and asset CDN) and shuts them down after the test.
+    servers = []
+
+    def start(assets, **options):
+        instance = BenchmarkServer(assets, **options)
+        threading.Thread(target=instance.serve_forever, daemon=True).start()
+        servers.append(instance)
+        return instance
+    yield start
+    for instance in servers:
+        instance.shutdown()
+        instance.server_close()
+
+
+@pytest.fixture
+def make_toolchain(tmp_path):
+    # Builds a .7z archive with a mingw64/ tree holding the given files.
+    py7zr = pytest.importorskip('py7zr')
+
+    def make(name, files):
+        tree = tmp_path / f"tree-{name}" / 'mingw64'
+        for rel, content in files.items():
+            path = tree / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(content)
+        archive_path = str(tmp_path / f"{name}.7z")
+        with py7zr.SevenZipFile(archive_path, 'w') as archive:
+            archive.writeall(str(tree), 'mingw64')
+        return archive_path
+    return make
@@ -3,29 +3,54 @@ import os
 import subprocess
 import urllib.request
 import importlib
-import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
-import requests
+import importlib.util
+import argparse
 import logging
-from tqdm import tqdm
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+import logging.handlers
 import shutil
-import winreg
+import stat
 import queue
 from datetime import datetime
 import platform
 import webbrowser
-import win32gui
-import win32con
 import threading
-import functools
+import json
+import hashlib
+import math
+import re
+import time
+import tempfile
+import itertools
+import http.server
+from collections import namedtuple, deque, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, quote, unquote
+
+try:
+    import requests
+except ImportError:  # installed by `python main.py --bootstrap`
+    requests = None
+
+try:
+    import tkinter as tk
+    from tkinter import ttk, messagebox, scrolledtext
+except ImportError:  # embeddable and slim Python builds; only the GUI needs Tk
+    tk = ttk = messagebox = scrolledtext = None
+
+# Third-party and Windows-only modules (tqdm, watchdog, winreg, win32gui) are
+# imported where they are used so the module imports cheaply on any platform.
+DEPENDENCIES = [
+    ('requests', 'requests'),
+    ('tqdm', 'tqdm'),
+    ('watchdog', 'watchdog'),
+]
+if os.name == 'nt':
+    DEPENDENCIES.append(('pywin32', 'win32gui'))
 
 
 def download_file(url, filename):
     with urllib.request.urlopen(url) as response, open(filename, 'wb') as out_file:
-        data = response.read()
-        out_file.write(data)
+        shutil.copyfileobj(response, out_file)
 
 
 def install_pip():
@@ -44,105 +69,2818 @@ def install_pip():
 
 
 def check_pip():
-    try:
-        subprocess.check_call([sys.executable, "-m", "pip", "--version"])
-    except subprocess.CalledProcessError:
+    if importlib.util.find_spec('pip') is None:
         install_pip()
 
 
-def install_and_import(package):
+def missing_dependencies():
+    return [package for package, module in DEPENDENCIES if importlib.util.find_spec(module) is None]
+
+
+def install_and_import(package, module):
+    print(f"{package} não encontrado. Instalando...")
     try:
+        subprocess.check_call([sys.executable, "-m", "pip", "install", package])
+    except subprocess.CalledProcessError:
+        print(f"Erro ao instalar {package}. Por favor, instale manualmente.")
+        sys.exit(1)
+    importlib.invalidate_caches()
+    try:
+        importlib.import_module(module)
+    except ImportError:
         if package == 'pywin32':
-            import win32api
+            print("pywin32 instalado, mas não pode ser importado diretamente. Isso é normal.")
         else:
-            importlib.import_module(package)
-    except ImportError:
-        print(f"{package} não encontrado. Instalando...")
+            print(f"Erro: Não foi possível importar {package} após a instalação.")
+            sys.exit(1)
+
+
+def bootstrap_dependencies():
+    print("Verificando se o pip está instalado...")
+    check_pip()
+
+    print("Instalando e verificando dependências...")
+    missing = missing_dependencies()
+    for package, module in DEPENDENCIES:
+        if package in missing:
+            install_and_import(package, module)
+
+    print("Todas as dependências foram instaladas e verificadas com sucesso.")
+
+
+DEFAULT_SETTINGS = {
+    'install_root': 'C:\\' if os.name == 'nt' else os.path.join(os.path.expanduser('~'), 'mingw'),
+    'download_segments': 8,
+    'extractor': 'auto',
+    'seven_zip_path': '',
+    'extract_threads': 8,
+    'cache_dir': '',
+    'cache_budget_mb': 4096,
+    'delta_upgrades': True,
+    'dedupe_store': False,
+    'trace_file': '',
+    'trace_file_mb': 5,
+    'log_file_mb': 5,
+    'log_view_lines': 2000,
+    'mirror_url': '',
+    'max_downloads': 2,
+    'bandwidth_limit_kb': 0,
+    'prefetch': False,
+    'prefetch_limit_kb': 2048,
+}
+
+
+def user_cache_dir():
+    # Per-user and always writable, unlike the Python or frozen-exe folder
+    # (often under Program Files).
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), 'AppData', 'Local')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'mingw-downloader')
+
+
+def load_settings(path='mingw_downloader.json'):
+    # Defaults, overridden by an optional JSON file and then by MINGW_<KEY> environment variables.
+    settings = dict(DEFAULT_SETTINGS)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            settings.update(json.load(f))
+    except (OSError, ValueError):
+        pass
+    for key, default in DEFAULT_SETTINGS.items():
+        value = os.environ.get(f"MINGW_{key.upper()}")
+        if value is None:
+            continue
+        if isinstance(default, bool):
+            settings[key] = value.lower() in ('1', 'true', 'yes', 'on')
+        elif isinstance(default, int):
+            settings[key] = int(value)
+        else:
+            settings[key] = value
+    return settings
+
+
+class Span:
+    __slots__ = ('tracer', 'operation_id', 'span_id', 'parent_id', 'depth', 'name', 'attributes',
+                 'wall_start', 'start', 'duration', 'error')
+
+    def __init__(self, tracer, name, parent, attributes):
+        self.tracer = tracer
+        self.operation_id = parent.operation_id if parent else os.urandom(6).hex()
+        self.span_id = next(tracer.ids)
+        self.parent_id = parent.span_id if parent else None
+        self.depth = parent.depth + 1 if parent else 0
+        self.name = name
+        self.attributes = attributes
+        self.wall_start = self.start = self.duration = 0.0
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+        self.tracer._push(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.tracer._pop(self)
+        return False
+
+    def to_dict(self):
+        return {
+            'operation': self.operation_id,
+            'span': self.span_id,
+            'parent': self.parent_id,
+            'name': self.name,
+            'start': self.wall_start,
+            'duration_ms': round(self.duration * 1000, 3),
+            'attributes': self.attributes,
+            'error': self.error,
+        }
+
+
+# Timed spans for fetch, download and install phases. A span opened on a thread
+# nests under that thread's current span, and a span with no parent starts a new
+# operation; work handed to a pool passes its parent explicitly. When an
+# operation's root span closes, its spans are appended to a JSON lines trace and
+# a summary table is sent to log.
+class Tracer:
+
+    def __init__(self, path='', log=None, max_bytes=0):
+        self.path = path
+        self.log = log
+        self.max_bytes = max_bytes
+        self.ids = itertools.count(1)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.operations = defaultdict(list)
+
+    def current(self):
+        stack = getattr(self.local, 'stack', None)
+        return stack[-1] if stack else None
+
+    def span(self, name, parent=None, **attributes):
+        return Span(self, name, parent or self.current(), attributes)
+
+    def _push(self, span):
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        self.local.stack.append(span)
+
+    def _pop(self, span):
+        stack = self.local.stack
+        if span in stack:
+            del stack[stack.index(span):]
+        with self.lock:
+            self.operations[span.operation_id].append(span)
+            if span.parent_id is not None:
+                return
+            spans = self.operations.pop(span.operation_id)
+        spans.sort(key=lambda s: s.start)
+        self.export(spans)
+        if self.log:
+            self.log(self.summary(spans))
+
+    def export(self, spans):
+        if not self.path:
+            return
         try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", package])
-            if package == 'pywin32':
-                import win32api
+            with self.lock:
+                # Like the log: roll over to a single .1 backup instead of growing forever.
+                if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                    os.replace(self.path, self.path + '.1')
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    for span in spans:
+                        f.write(json.dumps(span.to_dict()) + '\n')
+        except OSError:
+            pass
+
+    @staticmethod
+    def summary(spans):
+        children = defaultdict(list)
+        root = None
+        for span in spans:
+            if span.parent_id is None:
+                root = span
             else:
-                globals()[package] = importlib.import_module(package)
-        except subprocess.CalledProcessError:
-            print(f"Erro ao instalar {package}. Por favor, instale manualmente.")
-            sys.exit(1)
-        except ImportError:
-            if package == 'pywin32':
-                print("pywin32 instalado, mas não pode ser importado diretamente. Isso é normal.")
+                children[span.parent_id].append(span)
+        total = root.duration or 1e-9
+        lines = [f"Trace {root.operation_id}: {root.name} took {root.duration:.3f} s"]
+        pending = [root]
+        while pending:
+            span = pending.pop()
+            attributes = ' '.join(f"{key}={value}" for key, value in span.attributes.items())
+            status = f" FAILED ({span.error})" if span.error else ''
+            lines.append(f"  {'  ' * span.depth}{span.name:<{28 - 2 * span.depth}} "
+                         f"{span.duration * 1000:>10.1f} ms {span.duration / total * 100:>5.1f}%  {attributes}{status}".rstrip())
+            pending.extend(reversed(children[span.span_id]))
+        return '\n'.join(lines)
+
+
+class DownloadError(Exception):
+    pass
+
+
+def create_session(pool_size=8):
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class DownloadJournal:
+
+    def __init__(self, path, url, total_size, ranges):
+        self.path = path
+        self.url = url
+        self.total_size = total_size
+        self.ranges = ranges
+        self.lock = threading.Lock()
+        self.last_saved = 0.0
+
+    @classmethod
+    def load(cls, path, url, total_size):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('url') != url or data.get('size') != total_size:
+            return None
+        return cls(path, url, total_size, [list(r) for r in data['ranges']])
+
+    def completed_bytes(self):
+        return sum(nxt - start for start, end, nxt in self.ranges)
+
+    def pending(self):
+        return [r for r in self.ranges if r[2] <= r[1]]
+
+    def save(self, force=False):
+        with self.lock:
+            now = time.monotonic()
+            if not force and now - self.last_saved < 0.5:
+                return
+            self.last_saved = now
+            data = {'url': self.url, 'size': self.total_size, 'ranges': [list(r) for r in self.ranges]}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class OrderedDigest:
+    # SHA-256 of a file whose byte ranges are written concurrently and out of
+    # order. Data landing exactly at the hashed frontier is hashed from the chunk
+    # in memory; ranges written ahead of it are recorded and read back from the
+    # file (still in the page cache) once the frontier reaches them, so the
+    # digest is ready when the last byte arrives without another pass over the
+    # archive. Writers must use unbuffered handles so read-back sees their data.
+
+    def __init__(self, path, block_size=1024 * 1024):
+        self.path = path
+        self.block_size = block_size
+        self.sha256 = hashlib.sha256()
+        self.offset = 0
+        self.ahead = {}
+        self.lock = threading.Lock()
+        self.reader = None
+
+    def update(self, start, data):
+        with self.lock:
+            if start == self.offset:
+                self.sha256.update(data)
+                self.offset += len(data)
             else:
-                print(f"Erro: Não foi possível importar {package} após a instalação.")
-                sys.exit(1)
+                self._record(start, start + len(data))
+            self._catch_up()
+
+    def mark(self, start, end):
+        # Bytes already on disk, e.g. from an interrupted download being resumed.
+        with self.lock:
+            if end > start:
+                self._record(start, end)
+            self._catch_up()
+
+    def _record(self, start, end):
+        # self.ahead maps the start of each written range to its end; a chunk
+        # that continues a range extends it.
+        for range_start, range_end in self.ahead.items():
+            if range_end == start:
+                self.ahead[range_start] = end
+                return
+        self.ahead[start] = end
+
+    def _catch_up(self):
+        while True:
+            start = next((s for s in self.ahead if s <= self.offset), None)
+            if start is None:
+                return
+            end = self.ahead.pop(start)
+            if end <= self.offset:
+                continue
+            if self.reader is None:
+                self.reader = open(self.path, 'rb')
+            self.reader.seek(self.offset)
+            while self.offset < end:
+                block = self.reader.read(min(self.block_size, end - self.offset))
+                if not block:
+                    raise DownloadError(f"Short read while hashing {self.path} at byte {self.offset}")
+                self.sha256.update(block)
+                self.offset += len(block)
+
+    def hexdigest(self, total_size):
+        with self.lock:
+            self._catch_up()
+            if self.reader:
+                self.reader.close()
+                self.reader = None
+            if self.offset != total_size or self.ahead:
+                raise DownloadError(f"Download is incomplete: hashed {self.offset} of {total_size} bytes")
+            return self.sha256.hexdigest()
+
+
+class TokenBucket:
+    # Byte budget shared by every transfer that holds it. consume() may overdraw
+    # the bucket and then sleeps off its share of the debt, so the combined rate
+    # of concurrent callers stays at `rate` bytes per second.
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(rate, 256 * 1024)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, amount):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            debt = -self.tokens
+        if debt > 0:
+            time.sleep(debt / self.rate)
+
+    def held(self):
+        return False
+
+    def wait(self):
+        pass
+
+
+class BackgroundThrottle:
+    # Throttle for speculative transfers: holds the transfer while paused() is
+    # true and applies its own rate cap on top of the shared one. Once
+    # promoted() (someone asked for the same file) only the shared cap applies.
+    # consume() never blocks for a pause: range downloads check held() between
+    # chunks and close their request, so no connection sits idle mid-body, and
+    # single-stream downloads (which cannot resume) call wait() themselves.
+
+    def __init__(self, rate, paused, promoted, shared=None, poll=0.5):
+        self.bucket = TokenBucket(rate) if rate > 0 else None
+        self.paused = paused
+        self.promoted = promoted
+        self.shared = shared
+        self.poll = poll
+
+    def held(self):
+        return not self.promoted() and self.paused()
+
+    def wait(self):
+        while self.held():
+            time.sleep(self.poll)
+
+    def consume(self, amount):
+        if not self.promoted():
+            if self.bucket:
+                self.bucket.consume(amount)
+        if self.shared:
+            self.shared.consume(amount)
+
+
+# Fetches an asset as parallel byte ranges into a preallocated .part file. A small
+# journal next to the .part file records what is still missing so an interrupted
+# transfer resumes where it stopped; servers that ignore Range get a single stream.
+class SegmentedDownloader:
+
+    def __init__(self, session, segments=8, min_segment_size=4 * 1024 * 1024,
+                 chunk_size=256 * 1024, retries=3, timeout=30, tracer=None, throttle=None):
+        self.session = session
+        self.segments = segments
+        self.min_segment_size = min_segment_size
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.timeout = timeout
+        self.tracer = tracer or Tracer()
+        self.throttle = throttle
+
+    def download(self, url, file_path, progress=None, sha256=None):
+        # Returns the SHA-256 of the file, computed while it was written. With
+        # sha256 given, a mismatch discards the download and raises DownloadError
+        # before the file ever reaches file_path.
+        part_path = file_path + '.part'
+        journal_path = part_path + '.json'
+        with self.tracer.span('download.probe') as span:
+            total_size, range_url = self._probe(url)
+            span.set(bytes=total_size, ranges=range_url is not None)
+
+        digest = OrderedDigest(part_path)
+        if range_url is None:
+            with self.tracer.span('download.stream', bytes=total_size):
+                total_size = self._fetch_stream(url, part_path, total_size, progress, digest)
+        else:
+            journal = None
+            if os.path.exists(part_path) and os.path.getsize(part_path) == total_size:
+                journal = DownloadJournal.load(journal_path, url, total_size)
+            if journal is None:
+                journal = DownloadJournal(journal_path, url, total_size, self._plan_ranges(total_size))
+                with open(part_path, 'wb') as f:
+                    f.truncate(total_size)
+                journal.save(force=True)
+            for start, end, nxt in journal.ranges:
+                digest.mark(start, nxt)
+            with self.tracer.span('download.ranges', bytes=total_size - journal.completed_bytes(),
+                                  segments=len(journal.pending())):
+                source = {'origin': url, 'url': range_url, 'lock': threading.Lock()}
+                self._fetch_ranges(source, part_path, journal, progress, digest)
+            journal.remove()
+
+        actual = digest.hexdigest(total_size)
+        if sha256 and actual != sha256.lower():
+            os.remove(part_path)
+            raise DownloadError(f"Checksum mismatch for {os.path.basename(file_path)}: "
+                                f"expected {sha256.lower()}, got {actual}")
+        os.replace(part_path, file_path)
+        return actual
+
+    def _probe(self, url):
+        # A one-byte range request tells us both the size and whether ranges work,
+        # and leaves us with the post-redirect URL for the segment requests.
+        with self.session.get(url, headers={'Range': 'bytes=0-0'}, stream=True, timeout=self.timeout) as r:
+            r.raise_for_status()
+            if r.status_code == 206:
+                match = re.match(r'bytes \d+-\d+/(\d+)', r.headers.get('content-range', ''))
+                if match:
+                    return int(match.group(1)), r.url
+            return int(r.headers.get('content-length', 0)), None
+
+    def _plan_ranges(self, total_size):
+        count = max(1, min(self.segments, math.ceil(total_size / self.min_segment_size)))
+        step = math.ceil(total_size / count)
+        return [[start, min(start + step, total_size) - 1, start] for start in range(0, total_size, step)]
+
+    def _fetch_ranges(self, source, part_path, journal, progress, digest):
+        pending = journal.pending()
+        state = {'done': journal.completed_bytes()}
+        if progress:
+            progress(state['done'], journal.total_size)
+        if not pending:
+            return
+        parent = self.tracer.current()
+        with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            futures = [executor.submit(self._fetch_segment, source, part_path, segment, journal, state, progress,
+                                       digest, parent)
+                       for segment in pending]
+            try:
+                for future in futures:
+                    future.result()
+            finally:
+                journal.save(force=True)
+
+    def _fetch_segment(self, source, part_path, segment, journal, state, progress, digest, parent=None):
+        with self.tracer.span('download.segment', parent, bytes=segment[1] + 1 - segment[2]) as span:
+            span.set(retries=self._fetch_segment_range(source, part_path, segment, journal, state, progress, digest))
+
+    def _refresh_source(self, source, stale_url, total_size):
+        # Signed CDN URLs (GitHub's expire after a few minutes) are re-resolved
+        # from the original URL once, however many segments notice at the same time.
+        with source['lock']:
+            if source['url'] != stale_url:
+                return
+            size, range_url = self._probe(source['origin'])
+            if range_url is None or size != total_size:
+                raise DownloadError(f"{source['origin']} changed while it was being downloaded")
+            source['url'] = range_url
+
+    def _fetch_segment_range(self, source, part_path, segment, journal, state, progress, digest):
+        attempt = 0
+        while segment[2] <= segment[1]:
+            if self.throttle and self.throttle.held():
+                # Paused between requests; the wait does not count as a retry.
+                journal.save(force=True)
+                self.throttle.wait()
+            url = source['url']
+            held = False
+            try:
+                headers = {'Range': f'bytes={segment[2]}-{segment[1]}'}
+                with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as r:
+                    r.raise_for_status()
+                    if r.status_code != 206:
+                        raise DownloadError(f"Server ignored range request for bytes {segment[2]}-{segment[1]}")
+                    with open(part_path, 'r+b', buffering=0) as f:
+                        f.seek(segment[2])
+                        for chunk in r.iter_content(chunk_size=self.chunk_size):
+                            chunk = chunk[:segment[1] + 1 - segment[2]]
+                            if self.throttle:
+                                self.throttle.consume(len(chunk))
+                            f.write(chunk)
+                            digest.update(segment[2], chunk)
+                            with journal.lock:
+                                segment[2] += len(chunk)
+                                state['done'] += len(chunk)
+                                done = state['done']
+                            if progress:
+                                progress(done, journal.total_size)
+                            journal.save()
+                            if segment[2] > segment[1]:
+                                break
+                            if self.throttle and self.throttle.held():
+                                held = True
+                                break
+                if segment[2] <= segment[1] and not held:
+                    raise DownloadError(f"Connection closed early at byte {segment[2]}")
+            except (requests.RequestException, DownloadError) as e:
+                attempt += 1
+                if attempt > self.retries:
+                    raise
+                response = getattr(e, 'response', None)
+                if response is not None and 400 <= response.status_code < 500:
+                    # Most likely an expired signed URL: retry at once with a fresh one.
+                    self._refresh_source(source, url, journal.total_size)
+                    continue
+                time.sleep(min(2 ** attempt, 10))
+        return attempt
+
+    def _fetch_stream(self, url, part_path, total_size, progress, digest):
+        done = 0
+        with self.session.get(url, stream=True, timeout=self.timeout) as r:
+            r.raise_for_status()
+            with open(part_path, 'wb') as f:
+                for chunk in r.iter_content(chunk_size=self.chunk_size):
+                    if self.throttle:
+                        self.throttle.wait()
+                        self.throttle.consume(len(chunk))
+                    digest.update(done, chunk)
+                    done += f.write(chunk)
+                    if progress:
+                        progress(done, total_size)
+        if total_size and done != total_size:
+            raise DownloadError(f"Connection closed early at byte {done} of {total_size}")
+        return done
+
+
+class ReleaseIndexCache:
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('entries', {})
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        with self.lock:
+            data = json.dumps({'entries': self.entries})
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def get(self, url):
+        with self.lock:
+            return self.entries.get(url)
+
+    def put(self, url, assets, etag=None, last_modified=None, last_page=1):
+        with self.lock:
+            self.entries[url] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'last_page': last_page,
+                'fetched_at': time.time(),
+                'assets': assets,
+            }
+
+    def assets(self, url):
+        entry = self.get(url)
+        return entry['assets'] if entry else []
+
+
+class ReleaseClient:
+
+    def __init__(self, session, cache, timeout=30, per_page=100, max_workers=4, tracer=None):
+        self.session = session
+        self.cache = cache
+        self.timeout = timeout
+        self.per_page = per_page
+        self.max_workers = max_workers
+        self.tracer = tracer or Tracer()
+
+    def page_url(self, url, page):
+        parts = urlsplit(url)
+        query = dict(parse_qsl(parts.query))
+        query.update({'per_page': str(self.per_page), 'page': str(page)})
+        return urlunsplit(parts._replace(query=urlencode(query)))
+
+    def cached_assets(self, url):
+        first = self.cache.get(self.page_url(url, 1))
+        if not first:
+            return []
+        assets = []
+        for page in range(1, first.get('last_page', 1) + 1):
+            assets.extend(self.cache.assets(self.page_url(url, page)))
+        return assets
+
+    def fetch(self, url, on_page=None):
+        # Returns (assets, not_modified) for the whole release history. Page 1 is
+        # fetched first to learn the page count from the Link header; the rest are
+        # fetched concurrently and handed to on_page(assets) as each one arrives.
+        assets, not_modified, last_page = self.fetch_page(self.page_url(url, 1))
+        if not_modified:
+            return self.cached_assets(url), True
+        if on_page:
+            on_page(assets)
+
+        pages = {1: assets}
+        if last_page > 1:
+            parent = self.tracer.current()
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {executor.submit(self.fetch_page, self.page_url(url, page), parent): page
+                           for page in range(2, last_page + 1)}
+                for future in as_completed(futures):
+                    page_assets = future.result()[0]
+                    pages[futures[future]] = page_assets
+                    if on_page:
+                        on_page(page_assets)
+
+        with self.tracer.span('fetch.save_index'):
+            self.cache.save()
+        return [asset for page in sorted(pages) for asset in pages[page]], False
+
+    def fetch_page(self, url, parent=None):
+        with self.tracer.span('fetch.page', parent, page=int(dict(parse_qsl(urlsplit(url).query)).get('page', 1))) as span:
+            assets, not_modified, last_page = self._fetch_page(url)
+            span.set(assets=len(assets), not_modified=not_modified)
+            return assets, not_modified, last_page
+
+    def _fetch_page(self, url):
+        # GitHub does not charge a 304 against the rate limit.
+        headers = {'Accept': 'application/vnd.github+json'}
+        entry = self.cache.get(url)
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and entry:
+            return entry['assets'], True, entry.get('last_page', 1)
+        response.raise_for_status()
+
+        last_page = 1
+        last_link = response.links.get('last')
+        if last_link:
+            last_page = int(dict(parse_qsl(urlsplit(last_link['url']).query)).get('page', 1))
+
+        assets = self.parse_releases(response.json())
+        self.cache.put(url, assets, response.headers.get('ETag'), response.headers.get('Last-Modified'), last_page)
+        return assets, False, last_page
+
+    @staticmethod
+    def parse_releases(releases):
+        assets = []
+        for release in releases:
+            version = release['tag_name']
+            for asset in release['assets']:
+                if asset['name'].endswith('.7z'):
+                    assets.append({
+                        'version': version,
+                        'filename': asset['name'],
+                        'date': datetime.strptime(asset['updated_at'], "%Y-%m-%dT%H:%M:%SZ").strftime("%Y-%m-%d"),
+                        'url': asset['browser_download_url'],
+                        'size': asset.get('size', 0),
+                        'digest': asset.get('digest'),
+                    })
+        return assets
+
+
+ArchiveEntry = namedtuple('ArchiveEntry', ['path', 'size', 'crc', 'is_dir'])
+
+
+class ExtractStats:
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.bytes = 0
+        self.files = 0
+        self.started = time.monotonic()
+        self.seconds = 0.0
+
+    def finish(self):
+        self.seconds = time.monotonic() - self.started
+        return self
+
+    @property
+    def bytes_per_second(self):
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+    @property
+    def files_per_second(self):
+        return self.files / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (f"{self.backend}: {self.files} files, {self.bytes / 1048576:.1f} MiB in {self.seconds:.1f}s "
+                f"({self.bytes_per_second / 1048576:.1f} MiB/s, {self.files_per_second:.0f} files/s)")
+
+
+class Extractor:
+    # Backends implement available(), list() and extract(); progress callbacks
+    # receive (bytes_done, total_bytes, files_done). When members is given only
+    # those archive paths are extracted.
+    name = None
+
+    def available(self):
+        raise NotImplementedError
+
+    def list(self, archive_path):
+        raise NotImplementedError
+
+    def extract(self, archive_path, dest_dir, progress=None, members=None):
+        raise NotImplementedError
+
+
+class SevenZipExtractor(Extractor):
+    name = '7z'
+
+    def __init__(self, executable=''):
+        self.executable = executable or self.find_executable()
+
+    @staticmethod
+    def find_executable():
+        candidates = [shutil.which('7z'), shutil.which('7za')]
+        for env in ('ProgramFiles', 'ProgramFiles(x86)'):
+            if os.environ.get(env):
+                candidates.append(os.path.join(os.environ[env], '7-Zip', '7z.exe'))
+        candidates.append(r"C:\Program Files\7-Zip\7z.exe")
+        return next((c for c in candidates if c and os.path.exists(c)), None)
+
+    def available(self):
+        return bool(self.executable) and os.path.exists(self.executable)
+
+    def list(self, archive_path):
+        result = subprocess.run([self.executable, "l", "-slt", "-sccUTF-8", archive_path],
+                                capture_output=True, text=True, encoding='utf-8', errors='replace')
+        if result.returncode != 0:
+            raise Exception(f"Error listing archive: {result.stderr or result.stdout}")
+        entries = []
+        body = result.stdout.split('\n----------\n', 1)[-1]
+        for block in body.split('\n\n'):
+            fields = dict(line.split(' = ', 1) for line in block.splitlines() if ' = ' in line)
+            if 'Path' not in fields:
+                continue
+            is_dir = fields.get('Folder') == '+' or 'D' in fields.get('Attributes', '').split(' ')[0]
+            crc = int(fields['CRC'], 16) if fields.get('CRC') else None
+            entries.append(ArchiveEntry(fields['Path'].replace('\\', '/'), int(fields.get('Size') or 0), crc, is_dir))
+        return entries
+
+    def extract(self, archive_path, dest_dir, progress=None, members=None):
+        if not self.available():
+            raise FileNotFoundError("7-Zip is not installed or not found in the default location")
+        sizes = {e.path: e.size for e in self.list(archive_path) if not e.is_dir}
+        if members is not None:
+            sizes = {path: sizes[path] for path in members if path in sizes}
+        total_size = sum(sizes.values())
+        stats = ExtractStats(self.name)
+        tail = deque(maxlen=20)
+        command = [self.executable, "x", archive_path, f"-o{dest_dir}", "-y", "-mmt=on", "-bb1", "-bsp0", "-sccUTF-8"]
+        list_path = None
+        if members is not None:
+            with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as f:
+                f.write('\n'.join(members))
+                list_path = f.name
+            command += ["-scsUTF-8", f"@{list_path}"]
+        try:
+            with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                  text=True, encoding='utf-8', errors='replace') as proc:
+                for line in proc.stdout:
+                    line = line.rstrip()
+                    if line.startswith('- '):
+                        path = line[2:].replace('\\', '/')
+                        if path in sizes:
+                            stats.files += 1
+                            stats.bytes += sizes[path]
+                            if progress:
+                                progress(stats.bytes, total_size, stats.files)
+                    elif line:
+                        tail.append(line)
+        finally:
+            if list_path:
+                os.remove(list_path)
+        if proc.returncode != 0:
+            raise Exception(f"Error extracting file: {' '.join(tail)}")
+        return stats.finish()
+
+
+class _PooledWriter:
+    # Buffers a decompressed member in memory and hands it to the write pool when
+    # py7zr closes it; large members are written through directly.
+    direct_threshold = 4 * 1024 * 1024
+
+    def __init__(self, factory, path):
+        self.factory = factory
+        self.path = path
+        self.buffer = bytearray()
+        self.file = None
+        self.closed = False
+
+    def write(self, data):
+        if self.file is None and len(self.buffer) + len(data) > self.direct_threshold:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.file = open(self.path, 'wb')
+            self.file.write(self.buffer)
+            self.buffer = bytearray()
+        if self.file is not None:
+            self.file.write(data)
+        else:
+            self.buffer += data
+        return len(data)
+
+    def read(self, size=None):
+        return b''
+
+    def seek(self, offset, whence=0):
+        return offset
 
+    def flush(self):
+        pass
 
-def verify_installation(module_name):
+    def size(self):
+        return len(self.buffer)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self.file is not None:
+            written = self.file.tell()
+            self.file.close()
+            self.factory.done(written)
+        else:
+            self.factory.submit(self.path, bytes(self.buffer))
+            self.buffer = bytearray()
+
+
+class Py7zrExtractor(Extractor):
+    name = 'py7zr'
+
+    def __init__(self, threads=8):
+        self.threads = threads
+
+    def available(self):
+        return importlib.util.find_spec('py7zr') is not None
+
+    def list(self, archive_path):
+        import py7zr
+        with py7zr.SevenZipFile(archive_path, 'r') as archive:
+            return [ArchiveEntry(info.filename.replace('\\', '/'), info.uncompressed or 0, info.crc32, info.is_directory)
+                    for info in archive.list()]
+
+    def extract(self, archive_path, dest_dir, progress=None, members=None):
+        # py7zr decompresses each solid block on this thread while a pool writes
+        # the finished members to disk.
+        import py7zr
+
+        entries = self.list(archive_path)
+        if members is not None:
+            wanted = set(members)
+            entries = [e for e in entries if e.path in wanted]
+        for entry in entries:
+            if entry.is_dir:
+                os.makedirs(os.path.join(dest_dir, entry.path), exist_ok=True)
+        total_size = sum(e.size for e in entries if not e.is_dir)
+        stats = ExtractStats(self.name)
+        lock = threading.Lock()
+        pending = threading.BoundedSemaphore(self.threads * 4)
+        writers = []
+
+        def write_member(path, data):
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(data)
+            finally:
+                pending.release()
+            done(len(data))
+
+        def done(size):
+            with lock:
+                stats.files += 1
+                stats.bytes += size
+                snapshot = stats.bytes, stats.files
+            if progress:
+                progress(snapshot[0], total_size, snapshot[1])
+
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            futures = []
+
+            class Factory(py7zr.io.WriterFactory):
+                def create(self, filename):
+                    writer = _PooledWriter(self, filename)
+                    writers.append(writer)
+                    return writer
+
+                def submit(self, path, data):
+                    pending.acquire()
+                    futures.append(pool.submit(write_member, path, data))
+
+                def done(self, size):
+                    done(size)
+
+            with py7zr.SevenZipFile(archive_path, 'r') as archive:
+                if members is None:
+                    archive.extractall(path=dest_dir, factory=Factory())
+                elif members:
+                    archive.extract(path=dest_dir, targets=list(members), factory=Factory())
+            # Older py7zr releases never call close() on factory writers.
+            for writer in writers:
+                writer.close()
+            for future in futures:
+                future.result()
+        return stats.finish()
+
+
+def create_extractor(name='auto', seven_zip_path='', threads=8):
+    backends = {
+        '7z': lambda: SevenZipExtractor(seven_zip_path),
+        'py7zr': lambda: Py7zrExtractor(threads),
+    }
+    if name != 'auto':
+        if name not in backends:
+            raise ValueError(f"Unknown extractor: {name}")
+        return backends[name]()
+    for factory in backends.values():
+        extractor = factory()
+        if extractor.available():
+            return extractor
+    raise FileNotFoundError("No extractor available: install 7-Zip or the py7zr package")
+
+
+def is_link(path):
+    # True for symlinks and for Windows directory junctions.
     try:
-        importlib.import_module(module_name)
-        print(f"{module_name} instalado com sucesso.")
-    except ImportError:
-        print(f"Erro: {module_name} não foi instalado corretamente.")
-        sys.exit(1)
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISLNK(st.st_mode) or bool(getattr(st, 'st_file_attributes', 0) & 0x400)
 
 
-print("Verificando se o pip está instalado...")
-check_pip()
+def create_dir_link(target, link_path):
+    if os.name == 'nt':
+        import _winapi
+        _winapi.CreateJunction(os.path.abspath(target), link_path)
+    else:
+        os.symlink(os.path.abspath(target), link_path, target_is_directory=True)
+
+
+def remove_dir_link(link_path):
+    try:
+        os.unlink(link_path)
+    except (IsADirectoryError, PermissionError):
+        os.rmdir(link_path)
+
+
+class ObjectStore:
+    # Content-addressed hardlink store shared by installed versions. Each object
+    # is named by the SHA-256 of its bytes, hashed from the extracted file (the
+    # archive header only has a CRC32, which can collide), so only identical
+    # files are ever linked together and each is kept on disk once. The
+    # filesystem link count is the reference count: an object whose only
+    # remaining link is the store's own can be freed.
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+
+    def path(self, key):
+        return os.path.join(self.objects_dir, key[:2], key)
+
+    def lookup(self, key, size):
+        path = self.path(key)
+        try:
+            return path if os.path.getsize(path) == size else None
+        except OSError:
+            return None
+
+    def add(self, key, src_path):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.link(src_path, path)
+        except FileExistsError:
+            pass
+
+    def intern(self, key, file_path):
+        # Replaces file_path with a link to the existing object for key and
+        # returns True, or adds file_path as that object and returns False.
+        existing = self.lookup(key, os.path.getsize(file_path))
+        if existing is None:
+            self.add(key, file_path)
+            return False
+        link_path = file_path + '.link'
+        os.link(existing, link_path)
+        os.replace(link_path, file_path)
+        return True
+
+    def release(self, keys):
+        freed = 0
+        for key in keys:
+            path = self.path(key)
+            try:
+                st = os.stat(path)
+                if st.st_nlink <= 1:
+                    os.remove(path)
+                    freed += st.st_size
+            except OSError:
+                pass
+        return freed
+
+    def gc(self):
+        if not os.path.isdir(self.objects_dir):
+            return 0
+        keys = [key for prefix in os.listdir(self.objects_dir)
+                for key in os.listdir(os.path.join(self.objects_dir, prefix))]
+        return self.release(keys)
+
+
+class MinGWInstaller:
+    # Every asset is installed side by side under mingw-versions/<asset name>.
+    # install_root/mingw64 is a junction (a symlink off Windows) to the active one,
+    # so PATH entries never change and switching versions only swaps the link.
+
+    manifest_name = '.mingw-manifest.json'
+
+    def __init__(self, install_root, extractor='auto', seven_zip_path='', extract_threads=8, delta_upgrades=True,
+                 dedupe_store=False, log=print, tracer=None):
+        self.install_root = install_root
+        self.target_dir = os.path.join(install_root, 'mingw64')
+        self.versions_dir = os.path.join(install_root, 'mingw-versions')
+        self.active_manifest = os.path.join(install_root, 'mingw-active.json')
+        self.extractor = extractor
+        self.seven_zip_path = seven_zip_path
+        self.extract_threads = extract_threads
+        self.delta_upgrades = delta_upgrades
+        self.store = ObjectStore(os.path.join(install_root, 'mingw-store')) if dedupe_store else None
+        self.log = log
+        self.tracer = tracer or Tracer()
+
+    def get_extractor(self):
+        if isinstance(self.extractor, Extractor):
+            return self.extractor
+        return create_extractor(self.extractor, self.seven_zip_path, self.extract_threads)
+
+    @staticmethod
+    def version_name(archive_name):
+        name = os.path.basename(archive_name)
+        return name[:-3] if name.endswith('.7z') else name
+
+    def version_dir(self, name):
+        return os.path.join(self.versions_dir, name)
+
+    def is_installed(self, name):
+        return os.path.isdir(self.version_dir(name))
+
+    def installed_versions(self):
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(name for name in os.listdir(self.versions_dir)
+                      if not name.startswith('.') and os.path.isdir(self.version_dir(name)))
+
+    def active_version(self):
+        try:
+            with open(self.active_manifest, 'r', encoding='utf-8') as f:
+                name = json.load(f).get('name')
+        except (OSError, ValueError):
+            return None
+        return name if name and is_link(self.target_dir) and self.is_installed(name) else None
+
+    def install(self, archive_path, progress=None, activate=True, base=None):
+        # Extracts straight from the cached archive into a staging directory on the
+        # install volume and renames the finished tree into mingw-versions. The
+        # active toolchain keeps working until activate() swaps the link. With
+        # delta upgrades, files identical to the base version (by default the
+        # active one) are hardlinked from it and only the rest is extracted.
+        if not archive_path.endswith('.7z'):
+            raise ValueError("The downloaded file is not in .7z format")
+        name = self.version_name(archive_path)
+        os.makedirs(self.versions_dir, exist_ok=True)
+        with self.tracer.span('install.remove_stale'):
+            self.remove_stale()
+
+        if self.is_installed(name):
+            self.log(f"{name} is already installed")
+        else:
+            extractor = self.get_extractor()
+            with self.tracer.span('install.list', backend=extractor.name) as span:
+                top, dirs, files = self.manifest_entries(extractor.list(archive_path))
+                span.set(files=len(files), bytes=sum(info['size'] for info in files.values()))
+            if base is None and self.delta_upgrades:
+                base = self.active_version()
+            base_files = self.read_manifest(base) if base else None
+
+            staging_dir = tempfile.mkdtemp(prefix='.staging-', dir=self.versions_dir)
+            tree_dir = os.path.join(staging_dir, top)
+            try:
+                self.log(f"Extracting to staging directory: {staging_dir}")
+                mode = 'store' if self.store else 'delta' if base_files else 'full'
+                with self.tracer.span('install.extract', backend=extractor.name, mode=mode) as span:
+                    if base_files and not self.store:
+                        stats = self._stage_delta(archive_path, extractor, staging_dir, tree_dir, dirs, files,
+                                                  base, base_files, progress)
+                    else:
+                        stats = extractor.extract(archive_path, staging_dir, progress)
+                    span.set(bytes=stats.bytes, files=stats.files)
+                self.log(f"Extraction complete ({stats})")
+
+                entries = os.listdir(staging_dir)
+                if entries != [top]:
+                    raise Exception(f"Unexpected archive layout: {entries}")
+                with self.tracer.span('install.rename_make'):
+                    self.rename_mingw32_make(tree_dir)
+                if self.store:
+                    with self.tracer.span('install.store_add', files=len(files)):
+                        self._intern_tree(tree_dir, files)
+                with self.tracer.span('install.commit'):
+                    self.write_manifest(tree_dir, name, files)
+                    os.replace(tree_dir, self.version_dir(name))
+            finally:
+                with self.tracer.span('install.cleanup'):
+                    shutil.rmtree(staging_dir, ignore_errors=True)
+            self.log(f"MinGW installed to {self.version_dir(name)}")
+
+        if activate:
+            with self.tracer.span('install.activate', version=name):
+                self.activate(name)
+        return self.version_dir(name)
+
+    @staticmethod
+    def manifest_entries(entries):
+        # Maps archive entries to paths inside the installed tree. The sizes and
+        # CRC32s come from the archive header, so no file has to be read back.
+        tops = {entry.path.split('/', 1)[0] for entry in entries}
+        if len(tops) != 1:
+            raise Exception(f"Unexpected archive layout: {sorted(tops)}")
+        dirs, files = [], {}
+        for entry in entries:
+            if '/' not in entry.path:
+                continue
+            rel = entry.path.split('/', 1)[1]
+            if entry.is_dir:
+                dirs.append(rel)
+                continue
+            if rel == 'bin/mingw32-make.exe':
+                rel = 'bin/make.exe'
+            files[rel] = {'size': entry.size, 'crc': entry.crc, 'member': entry.path}
+        return tops.pop(), dirs, files
+
+    def _link_into(self, tree_dir, dirs, sources):
+        for rel in dirs:
+            os.makedirs(os.path.join(tree_dir, rel), exist_ok=True)
+        for rel, src in sources.items():
+            dest = os.path.join(tree_dir, rel)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            try:
+                os.link(src, dest)
+            except OSError:
+                shutil.copy2(src, dest)
+
+    def _intern_tree(self, tree_dir, files):
+        # Hashes every extracted file while it is still in the page cache and
+        # swaps each one the store already holds for a link to that object. The
+        # digests go into the manifest so removal releases exactly these objects.
+        def intern(rel):
+            path = os.path.join(tree_dir, rel)
+            key = file_sha256(path)
+            return rel, key, self.store.intern(key, path)
+
+        linked = 0
+        candidates = [rel for rel, info in files.items() if info['size']]
+        with ThreadPoolExecutor(max_workers=self.extract_threads) as executor:
+            for rel, key, shared in executor.map(intern, candidates):
+                files[rel]['sha256'] = key
+                linked += shared
+        self.log(f"Object store: {linked} files linked to existing objects, {len(candidates) - linked} new")
+
+    def _stage_delta(self, archive_path, extractor, staging_dir, tree_dir, dirs, files, base, base_files, progress):
+        base_dir = self.version_dir(base)
+        unchanged, changed = [], []
+        for rel, info in files.items():
+            old = base_files.get(rel)
+            same = old is not None and old[0] == info['size'] and (old[1] == info['crc'] or info['size'] == 0)
+            if same:
+                try:
+                    same = os.path.getsize(os.path.join(base_dir, rel)) == info['size']
+                except OSError:
+                    same = False
+            (unchanged if same else changed).append(rel)
+
+        self._link_into(tree_dir, dirs, {rel: os.path.join(base_dir, rel) for rel in unchanged})
+
+        removed = len(set(base_files) - set(files))
+        self.log(f"Delta upgrade from {base}: {len(unchanged)} unchanged files linked, "
+                 f"{len(changed)} changed or added, {removed} removed")
+        return extractor.extract(archive_path, staging_dir, progress, members=[files[rel]['member'] for rel in changed])
+
+    def manifest_path(self, name):
+        return os.path.join(self.version_dir(name), self.manifest_name)
+
+    def read_manifest(self, name):
+        try:
+            with open(self.manifest_path(name), 'r', encoding='utf-8') as f:
+                return json.load(f)['files']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def write_manifest(self, tree_dir, name, files):
+        manifest = {
+            'archive': name,
+            'files': {rel: [info['size'], info['crc']] + ([info['sha256']] if 'sha256' in info else [])
+                      for rel, info in sorted(files.items())},
+        }
+        with open(os.path.join(tree_dir, self.manifest_name), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+
+    def activate(self, name):
+        if not self.is_installed(name):
+            raise FileNotFoundError(f"{name} is not installed")
+        if os.path.exists(self.target_dir) and not is_link(self.target_dir):
+            # A plain directory left by an installer that predates side-by-side installs.
+            legacy_dir = self.version_dir(f"legacy-{time.strftime('%Y%m%d%H%M%S')}")
+            os.replace(self.target_dir, legacy_dir)
+            self.log(f"Moved existing installation to {legacy_dir}")
+
+        new_link = os.path.join(self.install_root, f".mingw64-{os.getpid()}-{time.monotonic_ns()}")
+        create_dir_link(self.version_dir(name), new_link)
+        try:
+            if os.name == 'nt' and is_link(self.target_dir):
+                # Junctions cannot be replaced in one call; keep the old one until
+                # the new one is in place so it can be restored on failure.
+                old_link = new_link + '.old'
+                os.replace(self.target_dir, old_link)
+                try:
+                    os.replace(new_link, self.target_dir)
+                except OSError:
+                    os.replace(old_link, self.target_dir)
+                    raise
+                remove_dir_link(old_link)
+            else:
+                os.replace(new_link, self.target_dir)
+        except OSError:
+            if is_link(new_link):
+                remove_dir_link(new_link)
+            raise
+
+        tmp_path = self.active_manifest + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'name': name, 'path': self.version_dir(name), 'activated_at': time.time()}, f)
+        os.replace(tmp_path, self.active_manifest)
+        self.log(f"Active MinGW version: {name}")
+
+    def remove_version(self, name):
+        # Returns the bytes freed in the object store (0 without one).
+        if not self.is_installed(name):
+            raise ValueError(f"{name} is not installed")
+        if name == self.active_version():
+            raise ValueError(f"{name} is the active version")
+        files = self.read_manifest(name) or {}
+        shutil.rmtree(self.version_dir(name))
+        self.log(f"Removed {name}")
+        if not self.store:
+            return 0
+        freed = self.store.release(entry[2] for entry in files.values() if len(entry) > 2)
+        self.log(f"Freed {format_bytes(freed)} of unshared objects")
+        return freed
+
+    def collect_garbage(self):
+        # Frees store objects no installed version links to any more, e.g. after
+        # a version directory was deleted by hand.
+        if not self.store:
+            return 0
+        freed = self.store.gc()
+        self.log(f"Freed {format_bytes(freed)} of unreferenced objects")
+        return freed
+
+    def remove_stale(self):
+        for name in os.listdir(self.versions_dir):
+            if name.startswith('.staging-'):
+                shutil.rmtree(os.path.join(self.versions_dir, name), ignore_errors=True)
+        for name in os.listdir(self.install_root):
+            path = os.path.join(self.install_root, name)
+            if name.startswith('.mingw64-') and is_link(path):
+                remove_dir_link(path)
+
+    def rename_mingw32_make(self, tree_dir):
+        mingw32_make_path = os.path.join(tree_dir, 'bin', 'mingw32-make.exe')
+        make_path = os.path.join(tree_dir, 'bin', 'make.exe')
+
+        if os.path.exists(make_path):
+            # Delta and store installs link make.exe straight from the manifest.
+            return
+        if os.path.exists(mingw32_make_path):
+            try:
+                os.rename(mingw32_make_path, make_path)
+                self.log("Successfully renamed mingw32-make.exe to make.exe")
+            except Exception as e:
+                self.log(f"Error renaming mingw32-make.exe: {str(e)}")
+        else:
+            self.log("mingw32-make.exe not found")
+
+
+SMOKE_C = '#include <stdio.h>\nint main(void) { puts("ok"); return 0; }\n'
+SMOKE_CPP = '#include <iostream>\n#include <string>\nint main() { std::cout << std::string("ok") << std::endl; }\n'
+
+
+# Checks an installed version with its own binaries (never whatever is on PATH):
+# gcc, g++, make and gdb --version, and a C and a C++ program compiled, linked
+# and (on Windows) run, all in parallel. A passing result is cached in
+# mingw-verify.json under the install root against a fingerprint of the
+# version's manifest plus the size and mtime of each tool, so re-verifying an
+# unchanged toolchain does not start a single process. gdb is reported but
+# not required.
+class ToolchainVerifier:
+    TOOLS = ('gcc', 'g++', 'make', 'gdb')
+    OPTIONAL = ('gdb',)
+
+    def __init__(self, installer, timeout=60, log=print, tracer=None):
+        self.installer = installer
+        self.timeout = timeout
+        self.log = log
+        self.tracer = tracer or Tracer()
+        self.cache_path = os.path.join(installer.install_root, 'mingw-verify.json')
+        self.lock = threading.Lock()
+
+    def tool_path(self, name, tool):
+        suffix = '.exe' if os.name == 'nt' else ''
+        bin_dir = os.path.join(self.installer.version_dir(name), 'bin')
+        path = os.path.join(bin_dir, tool + suffix)
+        if tool == 'make' and not os.path.exists(path):
+            path = os.path.join(bin_dir, 'mingw32-make' + suffix)
+        return path
+
+    def fingerprint(self, name):
+        digest = hashlib.sha256()
+        try:
+            with open(self.installer.manifest_path(name), 'rb') as f:
+                digest.update(f.read())
+        except OSError:
+            return None
+        for tool in self.TOOLS:
+            try:
+                st = os.stat(self.tool_path(name, tool))
+                digest.update(f"{tool}:{st.st_size}:{st.st_mtime_ns}".encode('utf-8'))
+            except OSError:
+                digest.update(f"{tool}:missing".encode('utf-8'))
+        return digest.hexdigest()
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_result(self, name, result):
+        with self.lock:
+            cache = self._load_cache()
+            cache[name] = result
+            tmp_path = self.cache_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, indent=1)
+            os.replace(tmp_path, self.cache_path)
+
+    def verify(self, name=None, force=False):
+        name = name or self.installer.active_version()
+        if not name or not self.installer.is_installed(name):
+            raise ProvisionError(f"MinGW version {name or '(none active)'} is not installed")
+        fingerprint = self.fingerprint(name)
+        if not force and fingerprint:
+            cached = self._load_cache().get(name)
+            if cached and cached.get('fingerprint') == fingerprint and cached.get('ok'):
+                return dict(cached, cached=True)
+
+        started = time.monotonic()
+        with self.tracer.span('verify', version=name) as span:
+            parent = self.tracer.current()
+            work_dir = tempfile.mkdtemp(prefix='mingw-verify-')
+            try:
+                jobs = {tool: (self._check_version, tool) for tool in self.TOOLS}
+                jobs['smoke_c'] = (self._check_smoke, 'gcc', 'smoke.c', SMOKE_C)
+                jobs['smoke_cpp'] = (self._check_smoke, 'g++', 'smoke.cpp', SMOKE_CPP)
+                with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+                    futures = {check: executor.submit(self._traced, parent, check, name, work_dir, *job)
+                               for check, job in jobs.items()}
+                    checks = {check: future.result() for check, future in futures.items()}
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+            ok = all(result['ok'] for check, result in checks.items() if check not in self.OPTIONAL)
+            span.set(ok=ok)
+
+        result = {
+            'version': name,
+            'fingerprint': fingerprint,
+            'ok': ok,
+            'checked_at': time.time(),
+            'seconds': round(time.monotonic() - started, 3),
+            'checks': checks,
+        }
+        if ok and fingerprint:
+            self._save_result(name, result)
+        return dict(result, cached=False)
+
+    def _traced(self, parent, check, name, work_dir, fn, *args):
+        with self.tracer.span(f"verify.{check}", parent) as span:
+            result = fn(name, work_dir, *args)
+            span.set(exit_code=result['exit_code'])
+            return result
+
+    def _run(self, name, args, cwd):
+        env = dict(os.environ)
+        env['PATH'] = os.path.join(self.installer.version_dir(name), 'bin') + os.pathsep + env.get('PATH', '')
+        started = time.monotonic()
+        try:
+            completed = subprocess.run(args, cwd=cwd, env=env, capture_output=True, text=True, timeout=self.timeout,
+                                       creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+            exit_code, output = completed.returncode, (completed.stdout + completed.stderr).strip()
+        except (OSError, subprocess.SubprocessError) as e:
+            exit_code, output = None, str(e)
+        return {
+            'ok': exit_code == 0,
+            'exit_code': exit_code,
+            'output': output[:2000],
+            'seconds': round(time.monotonic() - started, 3),
+        }
+
+    def _check_version(self, name, work_dir, tool):
+        path = self.tool_path(name, tool)
+        if not os.path.exists(path):
+            return {'ok': False, 'exit_code': None, 'output': f"{path} not found", 'seconds': 0.0}
+        result = self._run(name, [path, '--version'], work_dir)
+        result['version'] = result['output'].splitlines()[0] if result['ok'] and result['output'] else None
+        return result
+
+    def _check_smoke(self, name, work_dir, compiler, source_name, source):
+        source_path = os.path.join(work_dir, source_name)
+        with open(source_path, 'w', encoding='utf-8') as f:
+            f.write(source)
+        exe_path = os.path.join(work_dir, source_name.replace('.', '_') + '.exe')
+        result = self._run(name, [self.tool_path(name, compiler), source_path, '-o', exe_path], work_dir)
+        if result['ok'] and os.name == 'nt':
+            run = self._run(name, [exe_path], work_dir)
+            run['ok'] = run['ok'] and run['output'] == 'ok'
+            run['seconds'] += result['seconds']
+            result = run
+        return result
+
+
+def natural_key(value):
+    # Splits digit runs out so "13.2.0" sorts after "9.5.0" and "rev10" after "rev9".
+    return tuple((0, int(part), '') if part.isdigit() else (1, 0, part)
+                 for part in re.split(r'(\d+)', str(value).lower()) if part)
+
+
+class VersionRow:
+    __slots__ = ('version', 'filename', 'status', 'installed', 'date', 'url', 'compatible', 'item', 'search_key',
+                 'sort_keys')
+
+    def __init__(self, version, filename, status, date, url, compatible=False, installed=''):
+        self.version = version
+        self.filename = filename
+        self.status = status
+        self.installed = installed
+        self.date = date
+        self.url = url
+        self.compatible = compatible
+        self.item = None
+        self.search_key = f"{version}\n{filename}".lower()
+        self.sort_keys = {
+            'Version': natural_key(version),
+            'File': natural_key(filename),
+            'Status': status.lower(),
+            'Installed': installed.lower(),
+            'Date': date,
+        }
+
+    def values(self):
+        return (self.version, self.filename, self.status, self.installed, self.date)
+
+    def set_status(self, status):
+        self.status = status
+        self.sort_keys['Status'] = status.lower()
+
+    def set_installed(self, installed):
+        self.installed = installed
+        self.sort_keys['Installed'] = installed.lower()
+
+
+class VersionTableModel:
+    # Backing store for the version Treeview: rows indexed by filename and by tree
+    # item id, the current display order and the set of rows matching the filter.
+
+    def __init__(self):
+        self.rows = {}
+        self.by_item = {}
+        self.order = []
+        self.visible = set()
+        self.query = ''
+        self.sort_column = None
+        self.sort_reverse = False
+
+    def clear(self):
+        self.rows.clear()
+        self.by_item.clear()
+        self.order.clear()
+        self.visible.clear()
+
+    def add(self, row, item):
+        row.item = item
+        self.rows[row.filename] = row
+        self.by_item[item] = row
+        self.order.append(row.filename)
+        if self.query in row.search_key:
+            self.visible.add(row.filename)
+
+    def remove(self, filename):
+        row = self.rows.pop(filename)
+        self.by_item.pop(row.item, None)
+        self.order.remove(filename)
+        self.visible.discard(filename)
+        return row
+
+    def set_query(self, query):
+        # Returns (to_hide, to_show). Narrowing a query only rechecks visible rows,
+        # widening it only rechecks hidden ones.
+        query = query.lower()
+        if query.startswith(self.query):
+            candidates = list(self.visible)
+        elif self.query.startswith(query):
+            candidates = [f for f in self.rows if f not in self.visible]
+        else:
+            candidates = list(self.rows)
+        self.query = query
+
+        to_hide, to_show = [], []
+        for filename in candidates:
+            matches = query in self.rows[filename].search_key
+            if filename in self.visible and not matches:
+                to_hide.append(filename)
+            elif filename not in self.visible and matches:
+                to_show.append(filename)
+        self.visible.difference_update(to_hide)
+        self.visible.update(to_show)
+        return to_hide, to_show
+
+    def sort(self, column, reverse=False):
+        self.sort_column = column
+        self.sort_reverse = reverse
+        self.order.sort(key=lambda filename: self.rows[filename].sort_keys[column], reverse=reverse)
+
+    def visible_order(self):
+        return [filename for filename in self.order if filename in self.visible]
+
+
+def format_bytes(size):
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024 or unit == 'GiB':
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{int(size)} B"
+        size /= 1024
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return "--:--"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+ProgressSnapshot = namedtuple('ProgressSnapshot', ['task_id', 'label', 'done', 'total', 'rate', 'avg_rate', 'eta', 'finished'])
+
+
+class ProgressTask:
+    __slots__ = ('task_id', 'label', 'done', 'total', 'finished', 'last_done', 'last_time', 'rate', 'avg_rate')
+
+    def __init__(self, task_id, label, total):
+        self.task_id = task_id
+        self.label = label
+        self.done = 0
+        self.total = total
+        self.finished = False
+        self.last_done = 0
+        self.last_time = time.monotonic()
+        self.rate = 0.0
+        self.avg_rate = 0.0
+
+
+class ProgressBus:
+    # Workers publish counters as often as they like; subscribers only see one
+    # batch of snapshots per frame, produced by pump(). The GUI pumps from the Tk
+    # loop, headless consumers can call run() on a thread of their own.
+
+    def __init__(self, fps=10, smoothing=0.3):
+        self.interval = 1.0 / fps
+        self.smoothing = smoothing
+        self.lock = threading.Lock()
+        self.tasks = {}
+        self.dirty = set()
+        self.subscribers = []
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
+
+    def start(self, task_id, label, total=0):
+        with self.lock:
+            self.tasks[task_id] = ProgressTask(task_id, label, total)
+            self.dirty.add(task_id)
+
+    def publish(self, task_id, done, total=None):
+        with self.lock:
+            task = self.tasks.get(task_id)
+            if task is None:
+                return
+            task.done = done
+            if total:
+                task.total = total
+            self.dirty.add(task_id)
+
+    def finish(self, task_id):
+        with self.lock:
+            task = self.tasks.get(task_id)
+            if task is not None:
+                task.finished = True
+                self.dirty.add(task_id)
+
+    def pump(self):
+        now = time.monotonic()
+        with self.lock:
+            dirty, self.dirty = self.dirty, set()
+            snapshots = []
+            for task_id in dirty:
+                task = self.tasks[task_id]
+                elapsed = now - task.last_time
+                if elapsed > 0:
+                    task.rate = (task.done - task.last_done) / elapsed
+                    task.avg_rate = task.rate if not task.avg_rate else (
+                        self.smoothing * task.rate + (1 - self.smoothing) * task.avg_rate)
+                    task.last_done, task.last_time = task.done, now
+                eta = None
+                if task.total and task.avg_rate > 0:
+                    eta = max(task.total - task.done, 0) / task.avg_rate
+                snapshots.append(ProgressSnapshot(task.task_id, task.label, task.done, task.total,
+                                                  task.rate, task.avg_rate, eta, task.finished))
+                if task.finished:
+                    del self.tasks[task_id]
+        if snapshots:
+            for callback in list(self.subscribers):
+                callback(snapshots)
+        return snapshots
+
+    def run(self, stop_event):
+        while not stop_event.wait(self.interval):
+            self.pump()
+        self.pump()
+
+
+class TqdmProgress:
+    # Console subscriber for the progress bus: one tqdm bar per task.
+
+    def __init__(self):
+        self.bars = {}
+
+    def __call__(self, snapshots):
+        from tqdm import tqdm
+
+        for snap in snapshots:
+            bar = self.bars.get(snap.task_id)
+            if bar is None:
+                bar = self.bars[snap.task_id] = tqdm(desc=snap.label, total=snap.total or None, unit='iB',
+                                                     unit_scale=True, unit_divisor=1024)
+            if snap.total and bar.total != snap.total:
+                bar.total = snap.total
+            if snap.done > bar.n:
+                bar.update(snap.done - bar.n)
+            if snap.finished:
+                bar.close()
+                del self.bars[snap.task_id]
+
+
+class LogPaneHandler(logging.Handler):
+    # Runs on the logging listener thread and only buffers formatted lines; the
+    # Tk thread drains them once per frame. The buffer is a ring, so a burst
+    # larger than the pane can show never piles up in memory.
+
+    def __init__(self, capacity, level=logging.INFO):
+        super().__init__(level)
+        self.pending = deque(maxlen=capacity)
+
+    def emit(self, record):
+        try:
+            self.pending.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+    def drain(self):
+        lines = []
+        while True:
+            try:
+                lines.append(self.pending.popleft())
+            except IndexError:
+                return lines
+
+
+def detect_system_info():
+    arch = 'x86_64' if platform.machine().endswith('64') else 'i686'
+    return {
+        'arch': arch,
+        'bits': '64' if arch == 'x86_64' else '32',
+        'os': 'win32'
+    }
+
+
+class AssetRecord:
+    # One release asset, with the fields encoded in its filename parsed once, e.g.
+    # x86_64-13.2.0-release-posix-seh-ucrt-rt_v11-rev1.7z. Older names omit the
+    # CRT field; those builds link against msvcrt.
+    __slots__ = ('version', 'filename', 'date', 'url', 'size', 'digest', 'arch', 'gcc_version', 'gcc_major',
+                 'build_type', 'threads', 'exceptions', 'crt', 'runtime', 'revision', 'sort_key', 'compatible')
+
+    def __init__(self, asset, system_info):
+        self.version = asset['version']
+        self.filename = asset['filename']
+        self.date = asset['date']
+        self.url = asset['url']
+        self.size = asset.get('size', 0)
+        self.digest = asset.get('digest')
+
+        parts = self.filename[:-3].split('-') if self.filename.endswith('.7z') else self.filename.split('-')
+        fields = parts[:5] if len(parts) >= 7 else [None] * 5
+        self.arch, self.gcc_version, self.build_type, self.threads, self.exceptions = fields
+        rest = parts[5:] if len(parts) >= 7 else []
+        self.runtime = next((p for p in rest if p.startswith('rt_')), None)
+        self.revision = next((int(p[3:]) for p in rest if p.startswith('rev') and p[3:].isdigit()), 0)
+        self.crt = next((p for p in rest if not p.startswith(('rt_', 'rev'))), 'msvcrt' if rest else None)
+        self.gcc_major = self.gcc_version.split('.')[0] if self.gcc_version else None
+        self.sort_key = (natural_key(self.gcc_version or ''), self.revision, self.date)
+        self.compatible = self.is_compatible(system_info)
+
+    def is_compatible(self, system_info):
+        return (
+            self.arch == system_info['arch'] and
+            ((system_info['bits'] == '64' and self.exceptions == 'seh') or
+             (system_info['bits'] == '32' and self.exceptions == 'dwarf')) and
+            self.crt == 'ucrt' and
+            self.threads == 'posix'
+        )
+
+
+class AssetIndex:
+    # Records by filename plus one inverted index per facet, so queries such as
+    # query(arch='x86_64', threads='posix', crt='ucrt') are set intersections.
+    FACETS = ('arch', 'gcc_major', 'threads', 'exceptions', 'crt', 'runtime', 'compatible')
+
+    def __init__(self, system_info):
+        self.system_info = system_info
+        self.records = {}
+        self.facets = {facet: defaultdict(set) for facet in self.FACETS}
+
+    def __len__(self):
+        return len(self.records)
+
+    def clear(self):
+        self.records.clear()
+        for values in self.facets.values():
+            values.clear()
+
+    def add(self, asset):
+        if asset['filename'] in self.records:
+            self.remove(asset['filename'])
+        record = AssetRecord(asset, self.system_info)
+        self.records[record.filename] = record
+        for facet in self.FACETS:
+            self.facets[facet][getattr(record, facet)].add(record.filename)
+        return record
+
+    def remove(self, filename):
+        record = self.records.pop(filename)
+        for facet in self.FACETS:
+            self.facets[facet][getattr(record, facet)].discard(filename)
+        return record
+
+    def get(self, filename):
+        return self.records.get(filename)
+
+    def query(self, **criteria):
+        names = None
+        for facet, value in criteria.items():
+            if facet not in self.facets:
+                raise ValueError(f"Unknown facet: {facet}")
+            matches = self.facets[facet].get(value, set())
+            names = set(matches) if names is None else names & matches
+            if not names:
+                return []
+        records = self.records.values() if names is None else (self.records[n] for n in names)
+        # The filename breaks sort_key ties, so the order never depends on set
+        # iteration (string hashes are randomised per process).
+        return sorted(records, key=lambda r: (r.sort_key, r.filename), reverse=True)
+
+    def values(self, facet):
+        return sorted((value for value, names in self.facets[facet].items() if names and value is not None), key=natural_key)
+
+    @staticmethod
+    def newest_per_major(records):
+        newest = {}
+        for record in records:
+            current = newest.get(record.gcc_major)
+            if current is None or (record.sort_key, record.filename) > (current.sort_key, current.filename):
+                newest[record.gcc_major] = record
+        return newest
+
+    def recommended(self):
+        records = self.query(compatible=True)
+        return records[0] if records else None
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArchiveCache:
+    # Content-addressed archive store. Complete archives live at
+    # objects/<sha256>/<asset name>; downloads in flight stay under incoming/ and
+    # only enter the index once they have been moved into place, so a lookup
+    # never sees a half-written file. budget_bytes == 0 disables eviction.
+    # Pinned archives (waiting for or being installed) are never evicted.
+
+    def __init__(self, root, budget_bytes=0):
+        self.root = root
+        self.budget_bytes = budget_bytes
+        self.objects_dir = os.path.join(root, 'objects')
+        self.incoming_dir = os.path.join(root, 'incoming')
+        self.index_path = os.path.join(root, 'cache_index.json')
+        self.lock = threading.RLock()
+        self.entries = {}
+        self.pins = defaultdict(int)
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.incoming_dir, exist_ok=True)
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f).get('entries', {})
+        except (OSError, ValueError):
+            entries = {}
+        # Reconcile with the object directory: drop entries whose file is gone and
+        # adopt objects that were moved into place before the index was saved.
+        found = {}
+        for sha256 in os.listdir(self.objects_dir):
+            object_dir = os.path.join(self.objects_dir, sha256)
+            if os.path.isdir(object_dir):
+                for name in os.listdir(object_dir):
+                    found[name] = (sha256, os.path.getsize(os.path.join(object_dir, name)))
+        now = time.time()
+        with self.lock:
+            self.entries = {}
+            for name, (sha256, size) in found.items():
+                entry = entries.get(name)
+                if not entry or entry.get('sha256') != sha256 or entry.get('size') != size:
+                    entry = {'sha256': sha256, 'size': size, 'mtime_ns': None, 'added': now, 'last_used': now,
+                             'url': None}
+                self.entries[name] = entry
+        self.save()
+
+    def save(self):
+        # Held across the write so concurrent downloads don't share the temp file.
+        with self.lock:
+            tmp_path = self.index_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'entries': self.entries}, f, indent=1)
+            os.replace(tmp_path, self.index_path)
+
+    def object_path(self, name, sha256):
+        return os.path.join(self.objects_dir, sha256, name)
+
+    def incoming_path(self, name):
+        return os.path.join(self.incoming_dir, name)
+
+    def path_for(self, name):
+        with self.lock:
+            entry = self.entries.get(name)
+            if not entry:
+                return None
+            path = self.object_path(name, entry['sha256'])
+        try:
+            if os.path.getsize(path) == entry['size']:
+                return path
+        except OSError:
+            pass
+        return None
+
+    def contains(self, name):
+        return self.path_for(name) is not None
+
+    def verify(self, name):
+        # Each entry records the size and mtime the object had when its digest
+        # was computed. While both still match, the object is trusted without
+        # reading it; otherwise it is rehashed once, and dropped if it no longer
+        # matches its name. Returns the object path, or None.
+        with self.lock:
+            entry = self.entries.get(name)
+            if not entry:
+                return None
+            path = self.object_path(name, entry['sha256'])
+            size, mtime_ns = entry['size'], entry.get('mtime_ns')
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if st.st_size == size and st.st_mtime_ns == mtime_ns:
+            return path
+        if st.st_size != size or file_sha256(path) != entry['sha256']:
+            self.remove(name)
+            return None
+        with self.lock:
+            if name in self.entries:
+                self.entries[name]['mtime_ns'] = st.st_mtime_ns
+        self.save()
+        return path
+
+    def get(self, name):
+        with self.lock:
+            entry = self.entries.get(name)
+            return dict(entry) if entry else None
+
+    def ingest(self, src_path, name, url=None, sha256=None):
+        sha256 = sha256 or file_sha256(src_path)
+        size = os.path.getsize(src_path)
+        dest_path = self.object_path(name, sha256)
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        os.replace(src_path, dest_path)
+        mtime_ns = os.stat(dest_path).st_mtime_ns
+        now = time.time()
+        with self.lock:
+            previous = self.entries.get(name)
+            self.entries[name] = {'sha256': sha256, 'size': size, 'mtime_ns': mtime_ns, 'added': now, 'last_used': now,
+                                  'url': url}
+        if previous and previous['sha256'] != sha256:
+            self._delete_object(name, previous['sha256'])
+        self.evict(keep=(name,))
+        self.save()
+        return dest_path
+
+    def pin(self, name):
+        with self.lock:
+            self.pins[name] += 1
+
+    def unpin(self, name):
+        with self.lock:
+            self.pins[name] -= 1
+            if self.pins[name] <= 0:
+                del self.pins[name]
+
+    def touch(self, name):
+        with self.lock:
+            if name not in self.entries:
+                return
+            self.entries[name]['last_used'] = time.time()
+        self.save()
+
+    def remove(self, name):
+        with self.lock:
+            entry = self.entries.pop(name, None)
+        if entry:
+            self._delete_object(name, entry['sha256'])
+            self.save()
+        return entry is not None
+
+    def total_size(self):
+        with self.lock:
+            return sum(entry['size'] for entry in self.entries.values())
+
+    def evict(self, keep=()):
+        evicted = []
+        if not self.budget_bytes:
+            return evicted
+        with self.lock:
+            total = self.total_size()
+            for name, entry in sorted(self.entries.items(), key=lambda item: item[1]['last_used']):
+                if total <= self.budget_bytes:
+                    break
+                if name in keep or name in self.pins:
+                    continue
+                del self.entries[name]
+                total -= entry['size']
+                evicted.append((name, entry))
+        for name, entry in evicted:
+            self._delete_object(name, entry['sha256'])
+        return [name for name, _ in evicted]
+
+    def loose_archives(self):
+        return [name for name in os.listdir(self.root)
+                if name.endswith('.7z') and os.path.isfile(os.path.join(self.root, name))]
+
+    def _delete_object(self, name, sha256):
+        path = self.object_path(name, sha256)
+        try:
+            os.remove(path)
+            os.rmdir(os.path.dirname(path))
+        except OSError:
+            pass
+
+
+RELEASES_URL = "https://api.github.com/repos/niXman/mingw-builds-binaries/releases"
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_MISSING_DEPENDENCIES = 3
 
-print("Instalando e verificando dependências...")
-dependencies = [
-    'requests',
-    'tqdm',
-    'watchdog',
-    'pywin32'
-]
 
-for dep in dependencies:
-    install_and_import(dep)
+class ProvisionError(Exception):
+    pass
 
-# Verificar explicitamente os módulos do pywin32
-pywin32_modules = ['win32gui', 'win32con']
-for module in pywin32_modules:
+
+def add_to_user_path(bin_path):
+    # Appends bin_path to the per-user PATH in the registry and tells running
+    # processes about it. Returns False when it was already there.
+    import winreg
+    import win32con
+    import win32gui
+
+    key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Environment", 0, winreg.KEY_ALL_ACCESS)
     try:
-        globals()[module] = importlib.import_module(module)
-        print(f"{module} importado com sucesso.")
-    except ImportError:
-        print(f"Erro: Não foi possível importar {module}. Verifique se pywin32 está instalado corretamente.")
-        sys.exit(1)
+        current_path, _ = winreg.QueryValueEx(key, "Path")
+        if bin_path in current_path:
+            return False
+        winreg.SetValueEx(key, "Path", 0, winreg.REG_EXPAND_SZ, f"{current_path};{bin_path}")
+    finally:
+        winreg.CloseKey(key)
+    win32gui.SendMessage(win32con.HWND_BROADCAST, win32con.WM_SETTINGCHANGE, 0, 'Environment')
+    return True
+
+
+def load_manifest(path):
+    # A manifest is {"defaults": {...}, "toolchains": [entry, ...]} or a bare list
+    # of entries. An entry selects an asset by name ("asset") or by facets
+    # (arch, gcc_major, gcc_version, threads, exceptions, crt, runtime,
+    # compatible) and may set install_root, activate, add_to_path and verify. A lockfile
+    # is the same format with every entry pinned to asset, url, size and sha256.
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        data = {'toolchains': data}
+    defaults = data.get('defaults', {})
+    return [dict(defaults, **entry) for entry in data.get('toolchains', [])]
+
+
+class ScheduledJob:
+    __slots__ = ('key', 'kind', 'fn', 'priority', 'seq', 'depends', 'state', 'error', 'result', 'done')
+
+    def __init__(self, key, kind, fn, priority, seq, depends):
+        self.key = key
+        self.kind = kind
+        self.fn = fn
+        self.priority = priority
+        self.seq = seq
+        self.depends = depends
+        self.state = 'queued'
+        self.error = None
+        self.result = None
+        self.done = threading.Event()
+
+    @property
+    def finished(self):
+        return self.state in ('done', 'failed', 'cancelled')
+
+    def wait(self, timeout=None):
+        self.done.wait(timeout)
+        return self.state == 'done'
+
+
+# Runs jobs with at most limits[kind] of each kind active at once, highest
+# priority first and in submission order within a priority. Submitting a key
+# that is still queued or running returns the existing job (raising its
+# priority if needed), so two clicks never start two writers on one file. A
+# job with dependencies waits until they are done and is cancelled if one of
+# them fails. on_change(job) is called from scheduler threads on every state
+# change: waiting, queued, active, done, failed or cancelled.
+class JobScheduler:
+    PRIORITY_BACKGROUND = 0
+    PRIORITY_NORMAL = 10
+    PRIORITY_USER = 20
+
+    def __init__(self, limits, on_change=None):
+        self.limits = dict(limits)
+        self.on_change = on_change
+        self.active = defaultdict(int)
+        self.jobs = {}
+        self.seq = itertools.count()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            return self.jobs.get(key)
+
+    def submit(self, key, kind, fn, priority=PRIORITY_NORMAL, depends=()):
+        with self.lock:
+            job = self.jobs.get(key)
+            if job and not job.finished:
+                job.priority = max(job.priority, priority)
+                return job
+            job = self.jobs[key] = ScheduledJob(key, kind, fn, priority, next(self.seq), [d for d in depends if d])
+            if job.depends:
+                job.state = 'waiting'
+        self._notify(job)
+        self._dispatch()
+        return job
+
+    def busy(self, kinds, min_priority=PRIORITY_NORMAL):
+        # True while any job of these kinds at or above min_priority is unfinished.
+        with self.lock:
+            return any(job.kind in kinds and job.priority >= min_priority and not job.finished
+                       for job in self.jobs.values())
+
+    def cancel(self, key):
+        with self.lock:
+            job = self.jobs.get(key)
+            if not job or job.state not in ('waiting', 'queued'):
+                return False
+            job.state = 'cancelled'
+        job.done.set()
+        self._notify(job)
+        self._dispatch()
+        return True
+
+    def _dispatch(self):
+        changed, started = [], []
+        with self.lock:
+            for job in self.jobs.values():
+                if job.state != 'waiting':
+                    continue
+                if any(dep.state in ('failed', 'cancelled') for dep in job.depends):
+                    job.state = 'cancelled'
+                    job.error = "a job it depends on did not finish"
+                    job.done.set()
+                    changed.append(job)
+                elif all(dep.state == 'done' for dep in job.depends):
+                    job.state = 'queued'
+                    changed.append(job)
+            queued = sorted((job for job in self.jobs.values() if job.state == 'queued'),
+                            key=lambda job: (-job.priority, job.seq))
+            for job in queued:
+                if self.active[job.kind] < self.limits.get(job.kind, 1):
+                    self.active[job.kind] += 1
+                    job.state = 'active'
+                    started.append(job)
+        for job in [job for job in changed if job not in started] + started:
+            self._notify(job)
+        for job in started:
+            threading.Thread(target=self._run, args=(job,), daemon=True).start()
+        if any(job.state == 'cancelled' for job in changed):
+            self._dispatch()
+
+    def _run(self, job):
+        try:
+            result, error, state = job.fn(), None, 'done'
+        except Exception as e:
+            result, error, state = None, str(e), 'failed'
+        with self.lock:
+            self.active[job.kind] -= 1
+            job.result, job.error, job.state = result, error, state
+        job.done.set()
+        self._notify(job)
+        self._dispatch()
+
+    def _notify(self, job):
+        if self.on_change:
+            self.on_change(job)
+
+
+class ToolchainManager:
+    # GUI-free core shared by the Tk front end and the command line: release
+    # index, archive cache, downloads, and one installer per install root.
+
+    def __init__(self, settings, log=print, tracer=None, api_url=RELEASES_URL, progress_bus=None):
+        self.settings = settings
+        self.log = log
+        self.tracer = tracer or Tracer()
+        self.progress_bus = progress_bus
+        self.api_url = api_url
+        self.system_info = detect_system_info()
+        self.assets = AssetIndex(self.system_info)
+        self.session = create_session(settings['download_segments'])
+        self.download_folder = settings['cache_dir'] or user_cache_dir()
+        os.makedirs(self.download_folder, exist_ok=True)
+        self.archive_cache = ArchiveCache(self.download_folder, settings['cache_budget_mb'] * 1024 * 1024)
+        self.release_cache = ReleaseIndexCache(os.path.join(self.download_folder, 'mingw_releases.json'))
+        self.release_client = ReleaseClient(self.session, self.release_cache, tracer=self.tracer)
+        self.mirror_url = settings['mirror_url'].rstrip('/')
+        limit = settings['bandwidth_limit_kb'] * 1024
+        self.throttle = TokenBucket(limit) if limit > 0 else None
+        self.mirror_wait = 600
+        self.lock = threading.Lock()
+        self.installers = {}
+        self.verifiers = {}
+        self.root_locks = defaultdict(threading.Lock)
+
+    def installer_for(self, install_root=None):
+        install_root = os.path.abspath(install_root or self.settings['install_root'])
+        with self.lock:
+            installer = self.installers.get(install_root)
+            if installer is None:
+                installer = self.installers[install_root] = MinGWInstaller(
+                    install_root,
+                    extractor=self.settings['extractor'],
+                    seven_zip_path=self.settings['seven_zip_path'],
+                    extract_threads=self.settings['extract_threads'],
+                    delta_upgrades=self.settings['delta_upgrades'],
+                    dedupe_store=self.settings['dedupe_store'],
+                    log=self.log,
+                    tracer=self.tracer
+                )
+            return installer
+
+    def release_sources(self):
+        # A configured LAN mirror is tried before GitHub.
+        sources = [self.api_url]
+        if self.mirror_url:
+            sources.insert(0, f"{self.mirror_url}/releases")
+        return sources
+
+    def cached_releases(self):
+        for url in self.release_sources():
+            assets = self.release_client.cached_assets(url)
+            if assets:
+                return assets
+        return []
+
+    def fetch_releases(self, on_page=None):
+        sources = self.release_sources()
+        for url in sources[:-1]:
+            # A mirror that lists nothing (e.g. it could not reach GitHub itself)
+            # is treated as unavailable rather than as an empty release history.
+            try:
+                assets, not_modified = self.release_client.fetch(url, on_page)
+            except (requests.RequestException, ValueError, KeyError) as e:
+                self.log(f"Mirror {self.mirror_url} unavailable ({str(e)}); fetching versions from GitHub")
+                continue
+            if assets:
+                return assets, not_modified
+            self.log(f"Mirror {self.mirror_url} returned no releases; fetching versions from GitHub")
+        return self.release_client.fetch(sources[-1], on_page)
+
+    def load_index(self, refresh=True):
+        assets = self.cached_releases()
+        if refresh:
+            try:
+                assets, _ = self.fetch_releases()
+            except Exception as e:
+                if not assets:
+                    raise
+                self.log(f"Error fetching versions: {str(e)}; using the last known release index")
+        self.assets.clear()
+        for asset in assets:
+            self.assets.add(asset)
+        return self.assets
+
+    def resolve(self, entry):
+        # Returns the entry pinned to one asset. Pinned entries (lockfiles) are
+        # returned as they are, so provisioning from a lockfile never needs the API.
+        if entry.get('asset') and entry.get('url'):
+            return dict(entry)
+        if entry.get('asset'):
+            record = self.assets.get(entry['asset'])
+            if record is None:
+                raise ProvisionError(f"Unknown asset: {entry['asset']}")
+        else:
+            criteria = {facet: entry[facet] if facet == 'compatible' else str(entry[facet])
+                        for facet in AssetIndex.FACETS if facet in entry}
+            # Only builds that run here are chosen unless the entry names an
+            # architecture or exception model (or compatibility) itself.
+            if not any(facet in entry for facet in ('arch', 'exceptions', 'compatible')):
+                criteria['compatible'] = True
+            records = self.assets.query(**criteria)
+            if 'gcc_version' in entry:
+                records = [record for record in records if record.gcc_version == str(entry['gcc_version'])]
+            if not records:
+                raise ProvisionError(f"No release asset matches {entry}")
+            record = records[0]
+        digest = record.digest or ''
+        return dict(entry, asset=record.filename, url=record.url, size=record.size, version=record.version,
+                    sha256=entry.get('sha256') or (digest[7:] if digest.startswith('sha256:') else None))
+
+    def lock_entries(self, entries):
+        return [self.resolve(entry) for entry in entries]
+
+    def published_sha256(self, filename):
+        record = self.assets.get(filename)
+        if record and record.digest and record.digest.startswith('sha256:'):
+            return record.digest[7:].lower()
+        return None
+
+    def download(self, filename, url, progress=None, sha256=None, throttle=None):
+        # The archive is hashed as it is written and checked against the pinned
+        # or published SHA-256, so a bad download never enters the cache.
+        sha256 = (sha256 or self.published_sha256(filename) or '').lower() or None
+        path = self.archive_cache.path_for(filename)
+        if path is None:
+            with self.tracer.span('download', file=filename, verified=bool(sha256)) as span:
+                file_path = self.archive_cache.incoming_path(filename)
+                downloader = SegmentedDownloader(self.session, segments=self.settings['download_segments'],
+                                                 tracer=self.tracer, throttle=throttle or self.throttle)
+                actual = self.mirror_url and self._download_from_mirror(downloader, filename, file_path, progress, sha256)
+                if actual:
+                    span.set(source='mirror')
+                else:
+                    actual = downloader.download(url, file_path, progress, sha256)
+                    span.set(source='origin')
+                with self.tracer.span('download.ingest', bytes=os.path.getsize(file_path)):
+                    path = self.archive_cache.ingest(file_path, filename, url=url, sha256=actual)
+            self.log(f"Download complete: {path}" + (" (SHA-256 verified)" if sha256 else ""))
+        elif sha256 and self.archive_cache.get(filename)['sha256'] != sha256:
+            self.archive_cache.remove(filename)
+            raise ProvisionError(f"Cached {filename} does not match its published SHA-256; download it again")
+        return path
+
+    def _download_from_mirror(self, downloader, filename, file_path, progress, sha256=None):
+        # A mirror that does not have the archive yet fetches it once in the
+        # background and answers 503 with Retry-After; we wait for it rather than
+        # pulling the same archive over the uplink again. Any other failure falls
+        # back to the origin URL.
+        mirror_url = f"{self.mirror_url}/assets/{quote(filename)}"
+        deadline = time.monotonic() + self.mirror_wait
+        while True:
+            try:
+                return downloader.download(mirror_url, file_path, progress, sha256)
+            except requests.HTTPError as e:
+                response = e.response
+                if response is None or response.status_code != 503 or time.monotonic() > deadline:
+                    self.log(f"Mirror cannot serve {filename} ({str(e)}); downloading from GitHub")
+                    return None
+                self.log(f"Waiting for the mirror to fetch {filename}")
+                time.sleep(int(response.headers.get('Retry-After', 5)))
+            except (requests.RequestException, DownloadError) as e:
+                self.log(f"Mirror cannot serve {filename} ({str(e)}); downloading from GitHub")
+                return None
+
+    def verify(self, install_root=None, name=None, force=False):
+        # One verifier per root, so concurrent verifications share the lock
+        # around mingw-verify.json.
+        installer = self.installer_for(install_root)
+        with self.lock:
+            verifier = self.verifiers.get(installer.install_root)
+            if verifier is None:
+                verifier = self.verifiers[installer.install_root] = ToolchainVerifier(
+                    installer, log=self.log, tracer=self.tracer)
+        return verifier.verify(name, force)
+
+    def install(self, filename, install_root=None, activate=True, progress=None):
+        self.archive_cache.pin(filename)
+        try:
+            with self.tracer.span('install.verify', file=filename):
+                path = self.archive_cache.verify(filename)
+            if path is None:
+                raise ProvisionError(f"{filename} is missing from the archive cache or corrupt; download it again")
+            published = self.published_sha256(filename)
+            if published and self.archive_cache.get(filename)['sha256'] != published:
+                self.archive_cache.remove(filename)
+                raise ProvisionError(f"{filename} does not match its published SHA-256; download it again")
+            installer = self.installer_for(install_root)
+            with self.root_locks[installer.install_root]:
+                version_dir = installer.install(path, progress=progress, activate=activate)
+        finally:
+            self.archive_cache.unpin(filename)
+        self.archive_cache.touch(filename)
+        return version_dir
+
+    def provision(self, entries, jobs=4, install_jobs=2, refresh=True):
+        # Downloads every distinct asset on a bounded pool and installs each entry
+        # (unless it sets "install": false) as soon as its archive is ready; installs into different roots run in
+        # parallel, installs into the same root one at a time. Returns one result
+        # dict per entry, in manifest order.
+        results = []
+        resolved = []
+        if any(not (entry.get('asset') and entry.get('url')) for entry in entries):
+            self.load_index(refresh)
+        for entry in entries:
+            try:
+                resolved.append((entry, self.resolve(entry)))
+            except ProvisionError as e:
+                results.append(self._result(entry, None, error=str(e)))
+
+        # Archives waiting for an install stay pinned, so a download finishing in
+        # the meantime cannot evict them from the cache.
+        pinned = [item['asset'] for _, item in resolved if item.get('install', True)]
+        for asset in pinned:
+            self.archive_cache.pin(asset)
+        try:
+            with ThreadPoolExecutor(max_workers=jobs) as download_pool, \
+                    ThreadPoolExecutor(max_workers=install_jobs) as install_pool:
+                downloads = {}
+                for _, item in resolved:
+                    if item['asset'] not in downloads:
+                        downloads[item['asset']] = download_pool.submit(self._provision_download, item)
+                installs = [install_pool.submit(self._provision_one, entry, item, downloads[item['asset']])
+                            for entry, item in resolved]
+                results.extend(future.result() for future in installs)
+        finally:
+            for asset in pinned:
+                self.archive_cache.unpin(asset)
+        order = {id(entry): index for index, entry in enumerate(entries)}
+        results.sort(key=lambda result: order[id(result.pop('_entry'))])
+        return results
+
+    def _provision_download(self, item):
+        progress = None
+        if not self.archive_cache.contains(item['asset']):
+            progress = self._track(f"download:{item['asset']}", f"Downloading {item['asset']}")
+        try:
+            return self.download(item['asset'], item['url'], progress=progress, sha256=item.get('sha256'))
+        finally:
+            self._untrack(progress)
+
+    def _track(self, task_id, label):
+        # Progress callback publishing to the progress bus (the CLI's console
+        # bars), or None when nothing listens. Both download (done, total) and
+        # extract (done, total, files) callbacks fit.
+        if self.progress_bus is None:
+            return None
+        self.progress_bus.start(task_id, label)
+
+        def progress(done, total_size, *counts):
+            self.progress_bus.publish(task_id, done, total_size)
+        progress.task_id = task_id
+        return progress
+
+    def _untrack(self, progress):
+        if progress is not None:
+            self.progress_bus.finish(progress.task_id)
+
+    def _provision_one(self, entry, item, download):
+        started = time.monotonic()
+        try:
+            with self.tracer.span('provision', file=item['asset']):
+                path = download.result()
+                if not item.get('install', True):
+                    return self._result(entry, item, path=path, seconds=time.monotonic() - started)
+                progress = self._track(f"install:{id(entry)}", f"Extracting {item['asset']}")
+                try:
+                    version_dir = self.install(item['asset'], item.get('install_root'), item.get('activate', True),
+                                               progress=progress)
+                finally:
+                    self._untrack(progress)
+                if item.get('verify'):
+                    check = self.verify(item.get('install_root'), self.installer_for(item.get('install_root'))
+                                        .version_name(item['asset']))
+                    if not check['ok']:
+                        failed = ', '.join(name for name, result in check['checks'].items()
+                                           if not result['ok'] and name not in ToolchainVerifier.OPTIONAL)
+                        raise ProvisionError(f"Verification failed: {failed}")
+                if item.get('add_to_path'):
+                    bin_path = os.path.join(self.installer_for(item.get('install_root')).target_dir, 'bin')
+                    if os.name == 'nt':
+                        add_to_user_path(bin_path)
+                    else:
+                        self.log(f"Not adding {bin_path} to PATH: only supported on Windows")
+            return self._result(entry, item, path=version_dir, seconds=time.monotonic() - started)
+        except Exception as e:
+            self.log(f"Error provisioning {item['asset']}: {str(e)}")
+            return self._result(entry, item, error=str(e), seconds=time.monotonic() - started)
 
-print("Todas as dependências foram instaladas e verificadas com sucesso.")
+    def _result(self, entry, item, path=None, error=None, seconds=0.0):
+        installer = self.installer_for((item or entry).get('install_root'))
+        return {
+            '_entry': entry,
+            'name': entry.get('name') or (item or entry).get('asset') or json.dumps(entry, sort_keys=True),
+            'asset': item and item['asset'],
+            'install_root': installer.install_root,
+            'path': path,
+            'active': bool(path) and installer.active_version() == installer.version_name(item['asset']),
+            'status': 'failed' if error else 'ok',
+            'error': error,
+            'seconds': round(seconds, 3),
+        }
+
+    def remove(self, name, install_root=None):
+        installer = self.installer_for(install_root)
+        name = installer.version_name(name)
+        with self.root_locks[installer.install_root]:
+            freed = installer.remove_version(name)
+        return {'status': 'ok', 'version': name, 'install_root': installer.install_root, 'freed': freed}
+
+    def collect_garbage(self, install_root=None):
+        installer = self.installer_for(install_root)
+        with self.root_locks[installer.install_root]:
+            freed = installer.collect_garbage()
+        return {'status': 'ok', 'install_root': installer.install_root, 'freed': freed}
+
+    def status(self, install_root=None):
+        installer = self.installer_for(install_root)
+        with self.archive_cache.lock:
+            cached = sorted(self.archive_cache.entries)
+        return {
+            'install_root': installer.install_root,
+            'active': installer.active_version(),
+            'installed': installer.installed_versions(),
+            'cached': cached,
+        }
+
+
+class MirrorServer(http.server.ThreadingHTTPServer):
+    # LAN mirror: serves this machine's release index in the GitHub API format at
+    # /releases and cached archives at /assets/<name>, with Range support. An
+    # archive that is in the index but not yet cached is fetched from GitHub once
+    # in the background while clients are told to retry. A failed fetch is
+    # answered with 502 for failure_cooldown seconds, so clients fall back to
+    # GitHub at once instead of polling, and the mirror does not retry it either.
+    daemon_threads = True
+    failure_cooldown = 300
+
+    def __init__(self, manager, address, index_ttl=300):
+        super().__init__(address, MirrorHandler)
+        self.manager = manager
+        self.index_ttl = index_ttl
+        self.index_lock = threading.Lock()
+        self.index_fetched = None
+        self.pages = {}
+        self.fetching = {}
+        self.failures = {}
+
+    def refresh_index(self):
+        with self.index_lock:
+            self._refresh_index()
+
+    def _refresh_index(self):
+        # Called with index_lock held. Until a load yields any assets the index
+        # stays stale, so an empty list is never served for index_ttl seconds.
+        if self.index_fetched is not None and time.monotonic() - self.index_fetched <= self.index_ttl:
+            return
+        try:
+            self.manager.load_index()
+        except Exception as e:
+            self.manager.log(f"Error refreshing the release index: {str(e)}")
+        if len(self.manager.assets):
+            self.index_fetched = time.monotonic()
+        self.pages.clear()
+
+    def release_page(self, per_page, page):
+        with self.index_lock:
+            self._refresh_index()
+            key = (per_page, page)
+            if key not in self.pages:
+                self.pages[key] = self._render_page(per_page, page)
+            return self.pages[key]
+
+    def _render_page(self, per_page, page):
+        releases = {}
+        for record in sorted(self.manager.assets.records.values(), key=lambda r: r.date, reverse=True):
+            asset = {
+                'name': record.filename,
+                'size': record.size,
+                'updated_at': f"{record.date}T00:00:00Z",
+                'browser_download_url': record.url,
+            }
+            if record.digest:
+                asset['digest'] = record.digest
+            releases.setdefault(record.version, {'tag_name': record.version, 'assets': []})['assets'].append(asset)
+        releases = list(releases.values())
+        last_page = max(1, math.ceil(len(releases) / per_page))
+        body = json.dumps(releases[(page - 1) * per_page:page * per_page]).encode('utf-8')
+        return body, '"%s"' % hashlib.sha1(body).hexdigest(), last_page
+
+    def start_fetch(self, filename):
+        # Returns 'fetching' while a background fetch of filename is running,
+        # 'failed' while a recent fetch of it is cooling down and None for
+        # archives that are not in the index.
+        with self.index_lock:
+            thread = self.fetching.get(filename)
+            if thread and thread.is_alive():
+                return 'fetching'
+            failure = self.failures.get(filename)
+            if failure and time.monotonic() - failure[0] < self.failure_cooldown:
+                return 'failed'
+            self._refresh_index()
+            record = self.manager.assets.get(filename)
+            if record is None:
+                return None
+            self.failures.pop(filename, None)
+            thread = self.fetching[filename] = threading.Thread(
+                target=self._fetch, args=(filename, record.url), daemon=True)
+            thread.start()
+            return 'fetching'
+
+    def fetch_error(self, filename):
+        with self.index_lock:
+            failure = self.failures.get(filename)
+            return failure[1] if failure else None
+
+    def _fetch(self, filename, url):
+        try:
+            self.manager.download(filename, url)
+        except Exception as e:
+            self.manager.log(f"Error fetching {filename} for the mirror: {str(e)}")
+            with self.index_lock:
+                self.failures[filename] = (time.monotonic(), str(e))
+
+
+class MirrorHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        self.server.manager.log(f"{self.address_string()} {format % args}")
+
+    def do_HEAD(self):
+        self.do_GET(head=True)
+
+    def do_GET(self, head=False):
+        parts = urlsplit(self.path)
+        if parts.path.rstrip('/') == '/releases':
+            self.send_releases(parts, head)
+        elif parts.path.startswith('/assets/'):
+            self.send_asset(unquote(parts.path[len('/assets/'):]), head)
+        else:
+            self.send_error(404)
+
+    def send_releases(self, parts, head):
+        query = dict(parse_qsl(parts.query))
+        try:
+            per_page = min(max(int(query.get('per_page', 30)), 1), 100)
+            page = max(int(query.get('page', 1)), 1)
+        except ValueError:
+            self.send_error(400)
+            return
+        body, etag, last_page = self.server.release_page(per_page, page)
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('ETag', etag)
+        if page < last_page:
+            base = f"http://{self.headers.get('Host', '%s:%d' % self.server.server_address[:2])}/releases"
+            self.send_header('Link', f'<{base}?per_page={per_page}&page={page + 1}>; rel="next", '
+                                     f'<{base}?per_page={per_page}&page={last_page}>; rel="last"')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def send_asset(self, filename, head):
+        cache = self.server.manager.archive_cache
+        path = cache.path_for(filename)
+        if path is None:
+            state = self.server.start_fetch(filename)
+            if state == 'fetching':
+                self.send_response(503)
+                self.send_header('Retry-After', '5')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+            elif state == 'failed':
+                self.send_error(502, f"The mirror could not fetch {filename}", self.server.fetch_error(filename))
+            else:
+                self.send_error(404)
+            return
+
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        match = re.fullmatch(r'bytes=(\d*)-(\d*)', self.headers.get('Range', '').strip())
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            else:
+                start = max(size - int(match.group(2)), 0)
+            if start > end:
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{size}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Type', 'application/x-7z-compressed')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        if head:
+            return
+        if start == 0:
+            cache.touch(filename)
+        remaining = end - start + 1
+        with open(path, 'rb') as f:
+            f.seek(start)
+            while remaining > 0:
+                chunk = f.read(min(1024 * 1024, remaining))
+                if not chunk:
+                    break
+                try:
+                    self.wfile.write(chunk)
+                except (BrokenPipeError, ConnectionResetError):
+                    return
+                remaining -= len(chunk)
 
 
 class MinGWDownloader:
 
     def __init__(self):
-        self.github_api_url = "https://api.github.com/repos/niXman/mingw-builds-binaries/releases"
-        self.download_folder = "mingw_downloads"
-        self.log_queue = queue.Queue()
-        self.cached_versions = []
+        self.github_api_url = RELEASES_URL
+        self.versions = VersionTableModel()
+        self.installed_names = set()
+        self.active_name = None
+        self.progress_bus = ProgressBus()
+        self.progress_task = None
+        self.filter_job = None
+        self.settings = load_settings()
+        self.tracer = Tracer(self.settings['trace_file'], log=self.log_message,
+                             max_bytes=self.settings['trace_file_mb'] * 1024 * 1024)
         self.setup_logging()
+        self.core = ToolchainManager(self.settings, log=self.log_message, tracer=self.tracer, api_url=self.github_api_url)
+        self.system_info = self.core.system_info
+        self.assets = self.core.assets
+        self.installer = self.core.installer_for(self.settings['install_root'])
+        self.session = self.core.session
+        self.download_folder = self.core.download_folder
+        self.archive_cache = self.core.archive_cache
+        self.release_cache = self.core.release_cache
+        self.release_client = self.core.release_client
+        self.scheduler = JobScheduler(
+            {'download': self.settings['max_downloads'], 'install': 1, 'prefetch': 1},
+            on_change=lambda job: self.root.after(0, self._on_job_change, job)
+        )
         self.setup_gui()
-        self.download_folder = os.path.dirname(os.path.abspath(sys.executable))
+        self.recommendation_shown = False
         self.setup_folder_monitoring()
-        self.system_info = self.get_system_info()
 
     def setup_logging(self):
-        logging.basicConfig(
-            level=logging.DEBUG,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            filename='mingw_downloader.log',
-            filemode='w'
-        )
-        self.logger = logging.getLogger(__name__)
+        # Callers only enqueue records; a listener thread does the file, console
+        # and log pane I/O. The file rotates by size instead of being truncated
+        # on every launch.
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        file_handler = logging.handlers.RotatingFileHandler(
+            'mingw_downloader.log', maxBytes=self.settings['log_file_mb'] * 1024 * 1024, backupCount=3,
+            encoding='utf-8', delay=True)
+        file_handler.setLevel(logging.DEBUG)
+        file_handler.setFormatter(formatter)
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.INFO)
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
         console_handler.setFormatter(formatter)
-        self.logger.addHandler(console_handler)
+        console_handler.addFilter(logging.Filter(__name__))
+        self.log_pane_handler = LogPaneHandler(self.settings['log_view_lines'])
+        self.log_pane_handler.setFormatter(logging.Formatter('%(message)s'))
+        self.log_pane_handler.addFilter(logging.Filter(__name__))
+
+        log_queue = queue.SimpleQueue()
+        root_logger = logging.getLogger()
+        root_logger.setLevel(logging.DEBUG)
+        root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        self.log_listener = logging.handlers.QueueListener(
+            log_queue, file_handler, console_handler, self.log_pane_handler, respect_handler_level=True)
+        self.log_listener.start()
+        self.logger = logging.getLogger(__name__)
 
     def setup_gui(self):
         self.root = tk.Tk()
         self.root.title("evandro.dev.br - G++ Compiler Installer")
         self.root.geometry("800x600")
-        self.root.iconbitmap('evandro.ico')
+        if os.name == 'nt':
+            self.root.iconbitmap('evandro.ico')
 
         self.frame = ttk.Frame(self.root, padding="10")
         self.frame.pack(fill=tk.BOTH, expand=True)
@@ -163,7 +2901,7 @@ class MinGWDownloader:
         self.filter_entry.bind('<KeyRelease>', self.filter_treeview)
 
     def setup_treeview(self):
-        columns = ("Version", "File", "Status", "Date")
+        columns = ("Version", "File", "Status", "Installed", "Date")
         self.tree = ttk.Treeview(self.frame, columns=columns, show="headings")
         for col in columns:
             self.tree.heading(col, text=col, command=lambda _col=col: self.treeview_sort_column(self.tree, _col, False))
@@ -179,6 +2917,7 @@ class MinGWDownloader:
             ("Install MinGW", self.install_mingw),
             ("Download and Install", self.download_and_install),
             ("Remove Downloaded Version", self.remove_downloaded),
+            ("Uninstall Version", self.uninstall_version),
             ("Refresh Versions", self.fetch_versions),
             ("Add to PATH", self.add_mingw_to_path)
         ]
@@ -200,146 +2939,252 @@ class MinGWDownloader:
 
         self.progress_bar = ttk.Progressbar(self.frame, orient=tk.HORIZONTAL, length=300, mode='determinate')
         self.progress_bar.pack(pady=5)
+        self.progress_label = ttk.Label(self.frame, text="")
+        self.progress_label.pack()
 
     def setup_folder_monitoring(self):
+        from watchdog.observers import Observer
+
         os.makedirs(self.download_folder, exist_ok=True)
-        event_handler = DownloadFolderHandler(self)
+        self.folder_handler = DownloadFolderHandler(self)
         self.observer = Observer()
-        self.observer.schedule(event_handler, self.download_folder, recursive=False)
+        self.observer.schedule(self.folder_handler, self.download_folder, recursive=False)
         self.observer.start()
 
     def process_log_queue(self):
-        while True:
-            try:
-                message = self.log_queue.get_nowait()
-                self.log_text.insert(tk.END, message + '\n')
+        # One insert and at most one trim per frame, keeping the pane to the
+        # last log_view_lines lines. Only follows the end if the user has not
+        # scrolled up.
+        lines = self.log_pane_handler.drain()
+        if lines:
+            follow = self.log_text.yview()[1] >= 1.0
+            self.log_text.insert(tk.END, '\n'.join(lines) + '\n')
+            excess = int(self.log_text.index('end-1c').split('.')[0]) - 1 - self.settings['log_view_lines']
+            if excess > 0:
+                self.log_text.delete('1.0', f"{excess + 1}.0")
+            if follow:
                 self.log_text.see(tk.END)
-                self.log_queue.task_done()
-            except queue.Empty:
-                break
         self.root.after(100, self.process_log_queue)
 
     def log_message(self, message):
         self.logger.info(message)
-        self.log_queue.put(message)
-
-    def get_system_info(self):
-        arch = 'x86_64' if platform.machine().endswith('64') else 'i686'
-        return {
-            'arch': arch,
-            'bits': '64' if arch == 'x86_64' else '32',
-            'os': 'win32'
-        }
 
-    @functools.lru_cache(maxsize=None)
     def fetch_versions(self):
         self.log_message("Fetching available versions")
-        self.tree.delete(*self.tree.get_children())
+        cached_assets = self.core.cached_releases()
+        if cached_assets:
+            self._populate_versions(cached_assets)
+            self.log_message(f"Loaded {len(cached_assets)} versions from the local release index")
+        threading.Thread(target=self._fetch_versions_worker, args=(bool(cached_assets),), daemon=True).start()
+
+    def _fetch_versions_worker(self, have_cache):
         try:
-            response = requests.get(self.github_api_url)
-            response.raise_for_status()
-            releases = response.json()
-
-            self.cached_versions = []
-            for release in releases:
-                version = release['tag_name']
-                for asset in release['assets']:
-                    if asset['name'].endswith('.7z'):
-                        filename = asset['name']
-                        date = datetime.strptime(asset['updated_at'], "%Y-%m-%dT%H:%M:%SZ").strftime("%Y-%m-%d")
-                        status = "Downloaded" if self.is_downloaded(filename) else "Not Downloaded"
-                        download_url = asset['browser_download_url']
-                        self.cached_versions.append((version, filename, status, date, download_url))
-                        self.tree.insert("", "end", values=(version, filename, status, date))
-
-            self.log_message(f"Fetched {len(self.cached_versions)} versions")
-            self.recommend_version()
-            self.update_recommendation_highlight()
+            with self.tracer.span('fetch_versions', cached=have_cache) as span:
+                assets, not_modified = self.core.fetch_releases(
+                    on_page=lambda page_assets: self.root.after(0, self._merge_versions, page_assets)
+                )
+                span.set(assets=len(assets), not_modified=not_modified)
+            if not_modified:
+                self.log_message("Release index is up to date")
+            elif not assets:
+                self.log_message("No versions returned; keeping the current list")
+            else:
+                self.root.after(0, self._prune_versions, {asset['filename'] for asset in assets})
+                self.log_message(f"Fetched {len(assets)} versions")
+            self.root.after(0, self.prefetch_recommended)
         except Exception as e:
             self.log_message(f"Error fetching versions: {str(e)}")
-            messagebox.showerror("Error", f"Failed to fetch versions: {str(e)}")
+            if have_cache:
+                self.log_message("Using the last known release index")
+                self.root.after(0, self.prefetch_recommended)
+            else:
+                messagebox.showerror("Error", f"Failed to fetch versions: {str(e)}")
+
+    def _populate_versions(self, assets):
+        self.tree.delete(*self.tree.get_children())
+        self.versions.clear()
+        self.assets.clear()
+        self._load_install_state()
+        for asset in assets:
+            self._add_version_row(asset)
+        self._apply_sort()
+        self.recommend_version()
+
+    def _merge_versions(self, assets):
+        added = [self._add_version_row(asset) for asset in assets if asset['filename'] not in self.assets.records]
+        if added:
+            self._apply_sort()
+        self.recommend_version()
+
+    def _prune_versions(self, filenames):
+        for filename in [f for f in self.assets.records if f not in filenames]:
+            self.assets.remove(filename)
+            self.tree.delete(self.versions.remove(filename).item)
+
+    def _add_version_row(self, asset):
+        record = self.assets.add(asset)
+        filename = record.filename
+        status = "Downloaded" if self.is_downloaded(filename) else "Not Downloaded"
+        row = VersionRow(record.version, filename, status, record.date, record.url, compatible=record.compatible,
+                         installed=self._install_state(filename))
+        item = self.tree.insert("", "end", values=row.values(), tags=('recommended',) if row.compatible else ())
+        self.versions.add(row, item)
+        if filename not in self.versions.visible:
+            self.tree.detach(item)
+        return row
+
+    def _load_install_state(self):
+        self.installed_names = set(self.installer.installed_versions())
+        self.active_name = self.installer.active_version()
+
+    def _install_state(self, filename):
+        name = self.installer.version_name(filename)
+        if name == self.active_name:
+            return "Active"
+        return "Installed" if name in self.installed_names else ""
+
+    def refresh_install_state(self):
+        self._load_install_state()
+        for row in self.versions.rows.values():
+            installed = self._install_state(row.filename)
+            if row.installed != installed:
+                row.set_installed(installed)
+                self.tree.set(row.item, 'Installed', installed)
 
     def recommend_version(self):
-        for item in self.tree.get_children():
-            filename = self.tree.item(item)['values'][1]
-            if self.is_compatible_version(filename):
-                self.tree.item(item, tags=('recommended',))
         self.tree.tag_configure('recommended', background='light green')
+        if self.recommendation_shown:
+            return
+        self.recommendation_shown = True
         messagebox.showinfo("Recommendation", f"Versions compatible with your {self.system_info['bits']}-bit {self.system_info['arch']} system are highlighted in light green.")
 
     def is_compatible_version(self, filename):
-        parts = filename.split('-')
-        if len(parts) < 7:
-            return False
-        
-        arch, gcc_version, build_type, thread_model, exception_model, crt, revision = parts[:7]
-
-        return (
-            arch == self.system_info['arch'] and
-            ((self.system_info['bits'] == '64' and exception_model == 'seh') or
-             (self.system_info['bits'] == '32' and exception_model == 'dwarf')) and
-            crt == 'ucrt' and
-            thread_model == 'posix'
-        )
+        record = self.assets.get(filename)
+        return bool(record and record.compatible)
 
     def is_downloaded(self, filename):
-        return os.path.exists(os.path.join(self.download_folder, filename))
+        return self.archive_cache.contains(filename)
 
-    def download_selected(self):
+    def _selected_row(self, prompt):
         selected = self.tree.selection()
         if not selected:
-            messagebox.showinfo("Info", "Please select a version to download")
-            return
+            messagebox.showinfo("Info", prompt)
+            return None
+        return self.versions.by_item.get(selected[0])
 
-        version, filename, _, _ = self.tree.item(selected[0])['values']
-        download_url = next((v[4] for v in self.cached_versions if v[0] == version and v[1] == filename), None)
+    def download_selected(self):
+        row = self._selected_row("Please select a version to download")
+        if not row:
+            return
 
-        if not download_url:
+        if not row.url:
             messagebox.showerror("Error", "Failed to find download URL")
             return
 
-        threading.Thread(target=self._download_file, args=(filename, download_url)).start()
+        self.schedule_download(row.filename, row.url, notify=True)
+
+    def schedule_download(self, filename, download_url, notify=False, priority=JobScheduler.PRIORITY_USER):
+        # Returns the download job, or None when the archive is already cached.
+        if self.is_downloaded(filename):
+            return None
+
+        def run():
+            if not self._download_file(filename, download_url, notify=notify):
+                raise DownloadError(f"Download of {filename} failed")
+        return self.scheduler.submit(f"download:{filename}", 'download', run, priority)
+
+    def prefetch_recommended(self):
+        # Opt-in: fetch the newest compatible build into the cache while the app
+        # is idle, so Download and Install usually only has to extract. Prefetches
+        # use their own scheduler slot, are capped at prefetch_limit_kb and pause
+        # while any user download or install is pending. They share the download
+        # job key, so a user request for the same asset takes over the transfer
+        # at full speed instead of starting another one.
+        if not self.settings['prefetch']:
+            return
+        record = self.assets.recommended()
+        if (record is None or self.is_downloaded(record.filename)
+                or self.installer.is_installed(self.installer.version_name(record.filename))):
+            return
+        key = f"download:{record.filename}"
+        throttle = BackgroundThrottle(
+            self.settings['prefetch_limit_kb'] * 1024,
+            paused=lambda: self.scheduler.busy(('download', 'install')),
+            promoted=lambda: self.scheduler.get(key).priority > JobScheduler.PRIORITY_BACKGROUND,
+            shared=self.core.throttle
+        )
 
-    def _download_file(self, filename, download_url):
+        def run():
+            self.log_message(f"Prefetching the recommended build {record.filename}")
+            task_id = f"download:{record.filename}"
+            self.progress_bus.start(task_id, f"Prefetching {record.filename}")
+            try:
+                self.core.download(record.filename, record.url, throttle=throttle,
+                                   progress=lambda done, total_size: self.progress_bus.publish(task_id, done, total_size))
+            finally:
+                self.progress_bus.finish(task_id)
+        self.scheduler.submit(key, 'prefetch', run, JobScheduler.PRIORITY_BACKGROUND)
+
+    def schedule_install(self, version, filename, depends=()):
+        # The archive stays pinned in the cache from now until the job finishes
+        # (unpinned in _on_job_change), so other downloads cannot evict it.
+        def run():
+            if not self._install_mingw(version, filename):
+                raise Exception(f"Installation of {filename} failed")
+        job = self.scheduler.get(f"install:{filename}")
+        if not job or job.finished:
+            self.archive_cache.pin(filename)
+        return self.scheduler.submit(f"install:{filename}", 'install', run, JobScheduler.PRIORITY_USER, depends)
+
+    def _on_job_change(self, job):
+        filename = job.key.split(':', 1)[1]
+        if job.kind == 'install' and job.finished:
+            self.archive_cache.unpin(filename)
+        if job.state == 'done' or (job.state == 'cancelled' and job.kind != 'install'):
+            self.refresh_file_status(filename)
+            return
+        labels = {
+            ('download', 'queued'): "Queued",
+            ('download', 'active'): "Downloading",
+            ('download', 'failed'): "Download failed",
+            ('prefetch', 'queued'): "Queued",
+            ('prefetch', 'active'): "Prefetching",
+            ('prefetch', 'failed'): "Not Downloaded",
+            ('install', 'waiting'): "Install queued",
+            ('install', 'queued'): "Install queued",
+            ('install', 'active'): "Installing",
+            ('install', 'failed'): "Install failed",
+            ('install', 'cancelled'): "Install cancelled",
+        }
+        self.update_file_status(filename, labels[(job.kind, job.state)])
+
+    def _download_file(self, filename, download_url, notify=True):
         try:
             if self.is_downloaded(filename):
                 self.log_message(f"File {filename} is already downloaded")
-                messagebox.showinfo("Info", f"File {filename} is already downloaded")
-                return
+                if notify:
+                    messagebox.showinfo("Info", f"File {filename} is already downloaded")
+                return True
 
             self.log_message(f"Starting download of {filename}")
-            file_path = os.path.join(self.download_folder, filename)
-
-            with requests.get(download_url, stream=True) as r:
-                r.raise_for_status()
-                total_size = int(r.headers.get('content-length', 0))
-                block_size = 8192
-                with open(file_path, 'wb') as f, tqdm(
-                    desc=filename,
-                    total=total_size,
-                    unit='iB',
-                    unit_scale=True,
-                    unit_divisor=1024,
-                ) as progress_bar:
-                    for chunk in r.iter_content(chunk_size=block_size):
-                        size = f.write(chunk)
-                        progress_bar.update(size)
-                        self.root.after(0, self._update_progress, (progress_bar.n / total_size) * 100)
-
-            self.log_message(f"Download complete: {file_path}")
+            task_id = f"download:{filename}"
+            self.progress_bus.start(task_id, f"Downloading {filename}")
+            file_path = self.core.download(
+                filename, download_url, progress=lambda done, total_size: self.progress_bus.publish(task_id, done, total_size))
             self.log_message(f"File size: {os.path.getsize(file_path)} bytes")
-            messagebox.showinfo("Success", f"Successfully downloaded {filename}")
+            if notify:
+                messagebox.showinfo("Success", f"Successfully downloaded {filename}")
             self.root.after(0, self.update_file_status, filename, "Downloaded")
+            return True
         except Exception as e:
             self.log_message(f"Error downloading {filename}: {str(e)}")
             messagebox.showerror("Error", f"Failed to download {filename}: {str(e)}")
+            return False
         finally:
-            self.root.after(0, self._reset_progress)
+            self.progress_bus.finish(f"download:{filename}")
 
     def _install_mingw(self, version, filename):
-        source_file_path = os.path.join(self.download_folder, filename)
-        target_dir = r"C:\mingw64"
-        temp_dir = r"C:\mingw_temp"
+        source_file_path = self.archive_cache.path_for(filename) or self.archive_cache.incoming_path(filename)
 
         try:
             self.log_message(f"Starting installation of MinGW {version}")
@@ -347,148 +3192,139 @@ class MinGWDownloader:
             if not os.path.exists(source_file_path):
                 raise FileNotFoundError(f"Downloaded file not found: {source_file_path}")
 
-            if not filename.endswith('.7z'):
-                raise ValueError("The downloaded file is not in .7z format")
-
-            # Move the .7z file to C: drive
-            c_drive_file_path = os.path.join(r"C:", filename)
-            shutil.copy(source_file_path, c_drive_file_path)
-            self.log_message(f"Copied {filename} to C: drive")
-
-            self.clean_temp_directory(temp_dir)
-            self.log_message(f"Extracting to temporary directory: {temp_dir}")
-
-            seven_zip_path = r"C:\Program Files\7-Zip\7z.exe"
-            if not os.path.exists(seven_zip_path):
-                raise FileNotFoundError("7-Zip is not installed or not found in the default location")
-
-            extract_command = [seven_zip_path, "x", c_drive_file_path, f"-o{temp_dir}", "-y"]
-            result = subprocess.run(extract_command, capture_output=True, text=True)
-            if result.returncode != 0:
-                raise Exception(f"Error extracting file: {result.stderr}")
-
-            self.log_message("Extraction complete")
-
-            self.log_message(f"Moving files to {target_dir}")
-
-            if os.path.exists(target_dir):
-                shutil.rmtree(target_dir, ignore_errors=True)
-                self.log_message(f"Removed existing directory: {target_dir}")
-
-            extracted_dir = os.path.join(temp_dir, os.listdir(temp_dir)[0])
-            shutil.move(extracted_dir, target_dir)
-            self.log_message(f"MinGW installed to {target_dir}")
-
-            # Remove the .7z file from C: drive
-            os.remove(c_drive_file_path)
-            self.log_message(f"Removed {filename} from C: drive")
-
-            self.test_installation()
-            self.rename_mingw32_make()
+            task_id = f"install:{filename}"
+            self.progress_bus.start(task_id, f"Extracting {filename}")
+            with self.tracer.span('install', file=filename):
+                try:
+                    self.core.install(filename, self.installer.install_root,
+                                      progress=lambda done, total_size, files: self.progress_bus.publish(task_id, done, total_size))
+                finally:
+                    self.progress_bus.finish(task_id)
+                self.root.after(0, self.refresh_install_state)
+                self.test_installation()
 
             self.log_message("Installation complete. You may need to add MinGW to your system PATH.")
             messagebox.showinfo("Installation Complete", "MinGW has been successfully installed. You may need to add it to your system PATH.")
+            return True
         except Exception as e:
             self.log_message(f"Error during installation: {str(e)}")
-            self.log_message(f"File path: {c_drive_file_path}")
-            self.log_message(f"File exists: {os.path.exists(c_drive_file_path)}")
-            self.log_message(f"File size: {os.path.getsize(c_drive_file_path) if os.path.exists(c_drive_file_path) else 'N/A'}")
-            self.log_message(f"Temp directory contents: {os.listdir(temp_dir) if os.path.exists(temp_dir) else 'N/A'}")
+            self.log_message(f"File path: {source_file_path}")
+            self.log_message(f"File exists: {os.path.exists(source_file_path)}")
+            self.log_message(f"File size: {os.path.getsize(source_file_path) if os.path.exists(source_file_path) else 'N/A'}")
             messagebox.showerror("Error", f"Failed to install MinGW: {str(e)}")
-        finally:
-            self.clean_temp_directory(temp_dir)
-
-    def is_downloaded(self, filename):
-        return os.path.exists(os.path.join(self.download_folder, filename))
-
-    def _update_progress(self, value):
-        self.progress_bar['value'] = value
-        self.root.update_idletasks()
+            return False
 
-    def _reset_progress(self):
-        self.progress_bar['value'] = 0
-        self.root.update_idletasks()
+    def _activate_version(self, filename):
+        try:
+            self.installer.activate(self.installer.version_name(filename))
+            self.root.after(0, self.refresh_install_state)
+            messagebox.showinfo("Version Switched", f"{filename} is now the active MinGW version.")
+        except Exception as e:
+            self.log_message(f"Error switching version: {str(e)}")
+            messagebox.showerror("Error", f"Failed to switch MinGW version: {str(e)}")
+
+    def _pump_progress(self):
+        self.progress_bus.pump()
+        self.root.after(int(self.progress_bus.interval * 1000), self._pump_progress)
+
+    def _on_progress(self, snapshots):
+        for snap in snapshots:
+            if snap.finished:
+                if snap.task_id == self.progress_task:
+                    self.progress_task = None
+                    self.progress_bar['value'] = 0
+                    self.progress_label.config(text="")
+                continue
+            self.progress_task = snap.task_id
+            percent = (snap.done / snap.total) * 100 if snap.total else 0
+            self.progress_bar['value'] = percent
+            total = f" of {format_bytes(snap.total)}" if snap.total else ""
+            self.progress_label.config(
+                text=f"{snap.label}: {format_bytes(snap.done)}{total} at {format_bytes(snap.avg_rate)}/s, ETA {format_eta(snap.eta)}")
 
     def install_mingw(self):
-        selected = self.tree.selection()
-        if not selected:
-            messagebox.showinfo("Info", "Please select a version to install")
+        row = self._selected_row("Please select a version to install")
+        if not row:
+            return
+
+        if self.installer.is_installed(self.installer.version_name(row.filename)):
+            threading.Thread(target=self._activate_version, args=(row.filename,)).start()
             return
 
-        version, filename, status, _ = self.tree.item(selected[0])['values']
-        if status != "Downloaded":
+        if not self.is_downloaded(row.filename):
             messagebox.showinfo("Info", "Please download the selected version first")
             return
 
-        threading.Thread(target=self._install_mingw, args=(version, filename)).start()
+        self.schedule_install(row.version, row.filename)
 
     def add_mingw_to_path(self):
-        mingw_bin_path = r"C:\mingw64\bin"
+        mingw_bin_path = os.path.join(self.installer.target_dir, 'bin')
         if not os.path.exists(mingw_bin_path):
             messagebox.showerror("Error", "MinGW installation not found. Please install MinGW first.")
             return
 
         try:
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Environment", 0, winreg.KEY_ALL_ACCESS)
-            current_path, _ = winreg.QueryValueEx(key, "Path")
-            if mingw_bin_path not in current_path:
-                new_path_value = f"{current_path};{mingw_bin_path}"
-                winreg.SetValueEx(key, "Path", 0, winreg.REG_EXPAND_SZ, new_path_value)
+            if add_to_user_path(mingw_bin_path):
                 self.log_message(f"Added {mingw_bin_path} to PATH")
-                win32gui.SendMessage(win32con.HWND_BROADCAST, win32con.WM_SETTINGCHANGE, 0, 'Environment')
                 self.log_message("Notified other processes of PATH change")
                 messagebox.showinfo("Success", "MinGW has been added to your system PATH. You may need to restart your applications for the changes to take effect.")
             else:
                 self.log_message(f"{mingw_bin_path} already in PATH")
                 messagebox.showinfo("Info", "MinGW is already in your system PATH.")
-            winreg.CloseKey(key)
         except Exception as e:
             self.log_message(f"Error updating PATH: {str(e)}")
             messagebox.showerror("Error", f"Failed to add MinGW to PATH: {str(e)}")
 
     def test_installation(self):
-        try:
-            self.log_message("Testing GCC installation...")
-            gcc_version = subprocess.check_output(["gcc", "--version"], stderr=subprocess.STDOUT, text=True)
-            self.log_message(f"GCC version: {gcc_version.split()[2]}")
-
-            self.log_message("Testing G++ installation...")
-            gpp_version = subprocess.check_output(["g++", "--version"], stderr=subprocess.STDOUT, text=True)
-            self.log_message(f"G++ version: {gpp_version.split()[2]}")
-
-            self.log_message("GCC and G++ are available")
-            messagebox.showinfo("Installation Test", "GCC and G++ are successfully installed and available.")
-        except subprocess.CalledProcessError:
-            self.log_message("GCC or G++ not found. You may need to add MinGW to your system PATH.")
-            messagebox.showwarning("Installation Test", "GCC or G++ not found. You may need to add MinGW to your system PATH.")
-
-    def rename_mingw32_make(self):
-        mingw32_make_path = r"C:\mingw64\bin\mingw32-make.exe"
-        make_path = r"C:\mingw64\bin\make.exe"
+        # Checks the active version with its own binaries, so the result does not
+        # depend on PATH; an unchanged toolchain is answered from the cache.
+        if not self.installer.active_version():
+            messagebox.showinfo("Installation Test", "No MinGW version is installed and active.")
+            return
+        self.log_message("Testing the active MinGW installation...")
+        threading.Thread(target=self._test_installation_worker, daemon=True).start()
 
-        if os.path.exists(mingw32_make_path):
-            try:
-                os.rename(mingw32_make_path, make_path)
-                self.log_message("Successfully renamed mingw32-make.exe to make.exe")
-            except Exception as e:
-                self.log_message(f"Error renaming mingw32-make.exe: {str(e)}")
+    def _test_installation_worker(self):
+        try:
+            result = self.core.verify(self.installer.install_root)
+        except Exception as e:
+            self.log_message(f"Error testing installation: {str(e)}")
+            self.root.after(0, lambda: messagebox.showerror("Installation Test", f"Test failed: {str(e)}"))
+            return
+        lines = []
+        for check, item in result['checks'].items():
+            if item['ok']:
+                lines.append(f"{check}: {item.get('version') or 'ok'}")
+            else:
+                output = item['output'].splitlines() or [f"exit code {item['exit_code']}"]
+                lines.append(f"{check}: failed ({output[-1]})")
+            self.log_message(f"  {lines[-1]}")
+        cached = " (cached result)" if result['cached'] else ""
+        self.log_message(f"{result['version']}: {'all checks passed' if result['ok'] else 'checks failed'}{cached}")
+        if result['ok']:
+            self.root.after(0, lambda: messagebox.showinfo(
+                "Installation Test", f"{result['version']} works{cached}.\n\n" + "\n".join(lines)))
         else:
-            self.log_message("mingw32-make.exe not found")
+            self.root.after(0, lambda: messagebox.showwarning(
+                "Installation Test", f"{result['version']} failed some checks.\n\n" + "\n".join(lines)))
 
     def remove_downloaded(self):
-        selected = self.tree.selection()
-        if not selected:
-            messagebox.showinfo("Info", "Please select a version to remove")
+        row = self._selected_row("Please select a version to remove")
+        if not row:
             return
 
-        version, filename, status, _ = self.tree.item(selected[0])['values']
-        if status != "Downloaded":
+        filename = row.filename
+        if not self.is_downloaded(filename):
             messagebox.showinfo("Info", "This version is not downloaded")
             return
+        job = self.scheduler.get(f"install:{filename}")
+        if job and not job.finished:
+            messagebox.showinfo("Info", "This version is being installed")
+            return
 
-        file_path = os.path.join(self.download_folder, filename)
+        file_path = self.archive_cache.path_for(filename)
         try:
-            os.remove(file_path)
+            self.archive_cache.remove(filename)
             self.log_message(f"Removed downloaded file: {file_path}")
             self.update_file_status(filename, "Not Downloaded")
             messagebox.showinfo("Success", f"Successfully removed {filename}")
@@ -496,84 +3332,449 @@ class MinGWDownloader:
             self.log_message(f"Error removing file {filename}: {str(e)}")
             messagebox.showerror("Error", f"Failed to remove {filename}: {str(e)}")
 
-    def download_and_install(self):
-        selected = self.tree.selection()
-        if not selected:
-            messagebox.showinfo("Info", "Please select a version to download and install")
+    def uninstall_version(self):
+        row = self._selected_row("Please select a version to uninstall")
+        if not row:
             return
 
-        version, filename, status, _ = self.tree.item(selected[0])['values']
+        name = self.installer.version_name(row.filename)
+        if not self.installer.is_installed(name):
+            messagebox.showinfo("Info", "This version is not installed")
+            return
+        if name == self.installer.active_version():
+            messagebox.showinfo("Info", "This is the active version. Switch to another version before uninstalling it.")
+            return
+        job = self.scheduler.get(f"install:{row.filename}")
+        if job and not job.finished:
+            messagebox.showinfo("Info", "This version is being installed")
+            return
+        if not messagebox.askyesno("Uninstall Version", f"Remove {name} from {self.installer.versions_dir}?"):
+            return
+        threading.Thread(target=self._uninstall_version, args=(name,), daemon=True).start()
 
-        if status != "Downloaded":
-            self.download_selected()
+    def _uninstall_version(self, name):
+        try:
+            self.core.remove(name, self.installer.install_root)
+            self.root.after(0, self.refresh_install_state)
+        except Exception as e:
+            self.log_message(f"Error uninstalling {name}: {str(e)}")
+            self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to uninstall {name}: {str(e)}"))
 
-        self.install_mingw()
+    def download_and_install(self):
+        row = self._selected_row("Please select a version to download and install")
+        if not row:
+            return
+
+        if not self.is_downloaded(row.filename) and not row.url:
+            messagebox.showerror("Error", "Failed to find download URL")
+            return
+
+        if self.installer.is_installed(self.installer.version_name(row.filename)):
+            threading.Thread(target=self._activate_version, args=(row.filename,)).start()
+            return
+        # The install job depends on the download job, so extraction starts the
+        # moment the archive is complete instead of racing the download.
+        download = self.schedule_download(row.filename, row.url)
+        self.schedule_install(row.version, row.filename, depends=(download,))
 
     def filter_treeview(self, event=None):
-        query = self.filter_var.get().lower()
-        self.tree.delete(*self.tree.get_children())
-        for version, filename, status, date, _ in self.cached_versions:
-            if query in version.lower() or query in filename.lower():
-                self.tree.insert("", "end", values=(version, filename, status, date))
-        self.update_recommendation_highlight()
-
-    def update_recommendation_highlight(self):
-        for item in self.tree.get_children():
-            filename = self.tree.item(item)['values'][1]
-            if self.is_compatible_version(filename):
-                current_tags = list(self.tree.item(item)['tags'])
-                if 'recommended' not in current_tags:
-                    current_tags.append('recommended')
-                self.tree.item(item, tags=current_tags)
+        # Debounced so a burst of keystrokes triggers one filter pass.
+        if self.filter_job:
+            self.root.after_cancel(self.filter_job)
+        self.filter_job = self.root.after(150, self._apply_filter)
+
+    def _apply_filter(self):
+        self.filter_job = None
+        to_hide, to_show = self.versions.set_query(self.filter_var.get())
+        if to_hide:
+            self.tree.detach(*[self.versions.rows[f].item for f in to_hide])
+        if to_show:
+            to_show = set(to_show)
+            for index, filename in enumerate(self.versions.visible_order()):
+                if filename in to_show:
+                    self.tree.move(self.versions.rows[filename].item, '', index)
+
+    def _apply_sort(self):
+        if self.versions.sort_column is None:
+            return
+        self.versions.sort(self.versions.sort_column, self.versions.sort_reverse)
+        for index, filename in enumerate(self.versions.visible_order()):
+            self.tree.move(self.versions.rows[filename].item, '', index)
 
     def treeview_sort_column(self, tv, col, reverse):
-        l = [(tv.set(k, col), k) for k in tv.get_children('')]
-        l.sort(reverse=reverse)
-        for index, (val, k) in enumerate(l):
-            tv.move(k, '', index)
+        self.versions.sort(col, reverse)
+        self._apply_sort()
         tv.heading(col, command=lambda: self.treeview_sort_column(tv, col, not reverse))
 
-    def update_file_status(self, filename, status):
-        for item in self.tree.get_children():
-            if self.tree.item(item)['values'][1] == filename:
-                self.tree.item(item, values=(self.tree.item(item)['values'][0], filename, status, self.tree.item(item)['values'][3]))
-                break
+    def refresh_file_status(self, filename):
+        self.update_file_status(filename, "Downloaded" if self.is_downloaded(filename) else "Not Downloaded")
 
-    def clean_temp_directory(self, temp_dir):
-        self.log_message(f"Cleaning temporary directory: {temp_dir}")
-        if os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir, ignore_errors=True)
-        os.makedirs(temp_dir, exist_ok=True)
+    def refresh_file_statuses(self, filenames):
+        for filename in filenames:
+            self.refresh_file_status(filename)
+
+    def update_file_status(self, filename, status):
+        row = self.versions.rows.get(filename)
+        if row and row.status != status:
+            row.set_status(status)
+            self.tree.set(row.item, 'Status', status)
+
+    def _adopt_loose_archives(self, filenames=None):
+        # Archives downloaded by older versions, or copied in by hand (for example
+        # seeded from a network share), sit directly in the download folder. They
+        # are moved into the cache and the affected rows refreshed in one batch.
+        if filenames is None:
+            filenames = self.archive_cache.loose_archives()
+        changed = []
+        for filename in filenames:
+            path = os.path.join(self.download_folder, filename)
+            if os.path.isfile(path):
+                try:
+                    self.archive_cache.ingest(path, filename)
+                    self.log_message(f"Moved {filename} into the archive cache")
+                except OSError as e:
+                    self.log_message(f"Error adding {filename} to the archive cache: {str(e)}")
+                    continue
+            changed.append(filename)
+        if changed:
+            self.root.after(0, self.refresh_file_statuses, changed)
 
     def run(self):
+        # Archives already in the folder may still be being copied in, so they go
+        # through the watcher's settle check like any other.
+        self.folder_handler.schedule(self.archive_cache.loose_archives())
+        self.progress_bus.subscribe(self._on_progress)
+        self.progress_bus.subscribe(TqdmProgress())
         self.fetch_versions()
         self.root.after(100, self.process_log_queue)
+        self._pump_progress()
         try:
             self.root.mainloop()
         finally:
             self.observer.stop()
             self.observer.join()
-
-
-class DownloadFolderHandler(FileSystemEventHandler):
-
-    def __init__(self, app):
+            self.folder_handler.cancel()
+            self.log_listener.stop()
+
+
+class DownloadFolderHandler:
+    # Implements watchdog's handler protocol (dispatch) without subclassing
+    # FileSystemEventHandler, so watchdog is only imported when monitoring starts.
+    # Only complete archives directly in the folder matter: downloads in progress
+    # are .part files under incoming/, and temporary or hidden files are skipped.
+    # Matching names are collected and handed over in one batch once the folder
+    # has been quiet for `delay` seconds, so a bulk copy is reconciled once
+    # instead of once per event. A quiet folder does not mean a finished copy (a
+    # network copy can stall), so an archive is only handed over once its size
+    # and mtime are unchanged between two polls and, on Windows, it can be
+    # opened for writing (the copying process holds it open without sharing).
+
+    def __init__(self, app, delay=1.0):
         self.app = app
-
-    def on_created(self, event):
-        if not event.is_directory:
-            filename = os.path.basename(event.src_path)
-            self.app.root.after(0, self.app.update_file_status, filename, "Downloaded")
-
-    def on_deleted(self, event):
-        if not event.is_directory:
-            filename = os.path.basename(event.src_path)
-            self.app.root.after(0, self.app.update_file_status, filename, "Not Downloaded")
+        self.folder = os.path.abspath(app.download_folder)
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.stats = {}
+        self.last_event = 0.0
+        self.timer = None
+
+    def dispatch(self, event):
+        if event.is_directory or event.event_type not in ('created', 'modified', 'moved', 'deleted'):
+            return
+        paths = [event.src_path]
+        if event.event_type == 'moved':
+            paths.append(event.dest_path)
+        filenames = [os.path.basename(path) for path in paths if self.is_archive(path)]
+        if filenames:
+            self.schedule(filenames)
+
+    def is_archive(self, path):
+        filename = os.path.basename(path)
+        return (filename.endswith('.7z') and not filename.startswith(('.', '~'))
+                and os.path.dirname(os.path.abspath(path)) == self.folder)
+
+    def schedule(self, filenames):
+        with self.lock:
+            self.pending.update(filenames)
+            self.last_event = time.monotonic()
+            if self.timer is None:
+                self._start_timer(self.delay)
+
+    def _start_timer(self, delay):
+        self.timer = threading.Timer(delay, self.flush)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def flush(self):
+        with self.lock:
+            remaining = self.last_event + self.delay - time.monotonic()
+            if remaining > 0:
+                self._start_timer(remaining)
+                return
+            ready = [filename for filename in sorted(self.pending) if self._settled(filename)]
+            self.pending.difference_update(ready)
+            self.timer = None
+            if self.pending:
+                self._start_timer(self.delay)
+        if ready:
+            self.app._adopt_loose_archives(ready)
+
+    def _settled(self, filename):
+        # Called with the lock held. Archives that are gone are settled too, so
+        # their rows get refreshed.
+        path = os.path.join(self.folder, filename)
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.stats.pop(filename, None)
+            return True
+        current = (st.st_size, st.st_mtime_ns)
+        previous = self.stats.get(filename)
+        self.stats[filename] = current
+        if previous != current:
+            return False
+        if os.access(path, os.W_OK):
+            try:
+                with open(path, 'r+b'):
+                    pass
+            except OSError:
+                return False
+        del self.stats[filename]
+        return True
+
+    def cancel(self):
+        with self.lock:
+            if self.timer:
+                self.timer.cancel()
+                self.timer = None
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--json', action='store_true', help="print machine-readable JSON on stdout")
+    common.add_argument('--offline', action='store_true', help="use the cached release index without contacting GitHub")
+    common.add_argument('--quiet', action='store_true', help="do not print progress messages on stderr")
+
+    parser = argparse.ArgumentParser(description="MinGW downloader and installer")
+    parser.add_argument('--bootstrap', action='store_true', help="install missing Python dependencies and exit")
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.add_parser('gui', help="start the graphical interface (the default)")
+
+    command = commands.add_parser('list', parents=[common], help="list release assets")
+    command.add_argument('--all', action='store_true', help="include assets not compatible with this system")
+    command.add_argument('--newest-per-major', action='store_true', help="only the newest matching build of each GCC major")
+    for facet in ('arch', 'gcc_major', 'threads', 'exceptions', 'crt'):
+        command.add_argument(f"--{facet.replace('_', '-')}", dest=facet)
+
+    command = commands.add_parser('download', parents=[common], help="download assets into the archive cache")
+    command.add_argument('assets', nargs='+')
+    command.add_argument('--jobs', type=int, default=4, help="concurrent downloads")
+
+    command = commands.add_parser('install', parents=[common], help="download and install one asset")
+    command.add_argument('asset')
+    command.add_argument('--root', help="install root (default: the install_root setting)")
+    command.add_argument('--no-activate', action='store_true', help="install without switching the active version")
+    command.add_argument('--add-to-path', action='store_true', help="add the install root's bin directory to PATH")
+    command.add_argument('--verify', action='store_true', help="smoke-test the toolchain after installing it")
+
+    command = commands.add_parser('provision', parents=[common], help="provision every toolchain in a manifest or lockfile")
+    command.add_argument('manifest')
+    command.add_argument('--jobs', type=int, default=4, help="concurrent downloads")
+    command.add_argument('--install-jobs', type=int, default=2, help="concurrent installs (into different roots)")
+    command.add_argument('--verify', action='store_true', help="smoke-test every toolchain after installing it")
+
+    command = commands.add_parser('lock', parents=[common], help="pin a manifest's entries to exact assets")
+    command.add_argument('manifest')
+    command.add_argument('-o', '--output', help="write the lockfile here instead of stdout")
+
+    command = commands.add_parser('status', parents=[common], help="show installed versions and cached archives")
+    command.add_argument('--root', help="install root (default: the install_root setting)")
+
+    command = commands.add_parser('remove', parents=[common], help="remove an installed version that is not active")
+    command.add_argument('version', help="installed version or asset name")
+    command.add_argument('--root', help="install root (default: the install_root setting)")
+
+    command = commands.add_parser('gc', parents=[common], help="free object store files no installed version uses")
+    command.add_argument('--root', help="install root (default: the install_root setting)")
+
+    command = commands.add_parser('verify', parents=[common], help="check an installed toolchain with its own binaries")
+    command.add_argument('version', nargs='?', help="installed version (default: the active one)")
+    command.add_argument('--root', help="install root (default: the install_root setting)")
+    command.add_argument('--force', action='store_true', help="ignore a cached result and run every check")
+
+    command = commands.add_parser('serve', parents=[common], help="serve the release index and archive cache to the LAN")
+    command.add_argument('--host', default='0.0.0.0')
+    command.add_argument('--port', type=int, default=8765)
+    command.add_argument('--index-ttl', type=int, default=300, help="seconds between release index refreshes")
+    return parser
+
+
+def run_command(args):
+    # Every command returns (exit code, JSON-serialisable result); progress goes
+    # to stderr so stdout stays parseable with --json.
+    log = (lambda message: None) if args.quiet else (lambda message: print(message, file=sys.stderr))
+    settings = load_settings()
+    tracer = Tracer(settings['trace_file'], log=log, max_bytes=settings['trace_file_mb'] * 1024 * 1024)
+    manager = ToolchainManager(settings, log=log, tracer=tracer)
+    refresh = not args.offline
+
+    if args.command == 'list':
+        manager.load_index(refresh)
+        criteria = {facet: getattr(args, facet) for facet in ('arch', 'gcc_major', 'threads', 'exceptions', 'crt')
+                    if getattr(args, facet)}
+        if not args.all:
+            criteria['compatible'] = True
+        records = manager.assets.query(**criteria)
+        if args.newest_per_major:
+            records = sorted(AssetIndex.newest_per_major(records).values(),
+                             key=lambda record: (record.sort_key, record.filename), reverse=True)
+        result = [{
+            'asset': record.filename,
+            'version': record.version,
+            'gcc_version': record.gcc_version,
+            'date': record.date,
+            'size': record.size,
+            'compatible': record.compatible,
+            'downloaded': manager.archive_cache.contains(record.filename),
+        } for record in records]
+        return EXIT_OK, result
+
+    if args.command == 'status':
+        return EXIT_OK, manager.status(args.root)
+
+    if args.command == 'remove':
+        return EXIT_OK, manager.remove(args.version, args.root)
+
+    if args.command == 'gc':
+        return EXIT_OK, manager.collect_garbage(args.root)
+
+    if args.command == 'verify':
+        result = manager.verify(args.root, args.version, force=args.force)
+        return (EXIT_OK if result['ok'] else EXIT_FAILED), result
+
+    if args.command == 'serve':
+        server = MirrorServer(manager, (args.host, args.port), index_ttl=args.index_ttl)
+        server.refresh_index()
+        log(f"Serving {manager.download_folder} on http://{args.host}:{server.server_address[1]}/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return EXIT_OK, {'status': 'stopped'}
+
+    if args.command == 'lock':
+        entries = load_manifest(args.manifest)
+        manager.load_index(refresh)
+        lockfile = {'toolchains': manager.lock_entries(entries)}
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(lockfile, f, indent=2)
+        return EXIT_OK, lockfile
+
+    if args.command == 'download':
+        entries = [{'asset': asset, 'install': False} for asset in args.assets]
+        jobs, install_jobs = args.jobs, 1
+    elif args.command == 'install':
+        entries = [{'asset': args.asset, 'install_root': args.root, 'activate': not args.no_activate,
+                    'add_to_path': args.add_to_path, 'verify': args.verify}]
+        jobs, install_jobs = 1, 1
+    else:
+        entries = [dict(entry, verify=entry.get('verify', args.verify)) for entry in load_manifest(args.manifest)]
+        jobs, install_jobs = args.jobs, args.install_jobs
+
+    # Console bars for downloads and extraction, drawn on stderr by a pump
+    # thread like the GUI's; skipped with --quiet or without tqdm.
+    stop = threading.Event()
+    if not args.quiet and importlib.util.find_spec('tqdm') is not None:
+        manager.progress_bus = ProgressBus()
+        manager.progress_bus.subscribe(TqdmProgress())
+        pump = threading.Thread(target=manager.progress_bus.run, args=(stop,), daemon=True)
+        pump.start()
+    try:
+        results = manager.provision(entries, jobs=jobs, install_jobs=install_jobs, refresh=refresh)
+    finally:
+        stop.set()
+        if manager.progress_bus is not None:
+            pump.join()
+    failed = any(result['status'] != 'ok' for result in results)
+    return (EXIT_FAILED if failed else EXIT_OK), {'status': 'failed' if failed else 'ok', 'results': results}
+
+
+def print_result(command, result):
+    if command == 'list':
+        for item in result:
+            marker = '*' if item['downloaded'] else ' '
+            print(f"{marker} {item['asset']:<60} {item['version']:<16} {item['date']}")
+    elif command == 'status':
+        print(f"Install root: {result['install_root']}")
+        print(f"Active: {result['active'] or '-'}")
+        for name in result['installed']:
+            print(f"  installed {name}")
+        for name in result['cached']:
+            print(f"  cached    {name}")
+    elif command == 'remove':
+        print(f"Removed {result['version']} from {result['install_root']} ({format_bytes(result['freed'])} freed)")
+    elif command == 'gc':
+        print(f"Freed {format_bytes(result['freed'])} in {result['install_root']}")
+    elif command == 'verify':
+        print(f"{result['version']}: {'ok' if result['ok'] else 'FAILED'}"
+              f"{' (cached)' if result['cached'] else ''} in {result['seconds']}s")
+        for check, item in result['checks'].items():
+            output = item['output'].splitlines()
+            detail = item.get('version') or ('' if item['ok'] or not output else output[-1])
+            state = 'ok' if item['ok'] else 'skip' if check in ToolchainVerifier.OPTIONAL else 'fail'
+            print(f"  {state:<5} {check:<10} {detail}")
+    elif command == 'lock':
+        print(json.dumps(result, indent=2))
+    elif command == 'serve':
+        pass
+    else:
+        for item in result['results']:
+            print(f"{item['status']:<7} {item['name']:<60} {item['path'] or item['error']}")
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.bootstrap:
+        bootstrap_dependencies()
+        return EXIT_OK
+
+    if args.command in (None, 'gui'):
+        missing = missing_dependencies()
+        if missing:
+            print(f"Missing dependencies: {', '.join(missing)}. Run: python {os.path.basename(sys.argv[0])} --bootstrap")
+            return EXIT_MISSING_DEPENDENCIES
+        if tk is None:
+            print("Tkinter is not available in this Python; use the command line (python main.py --help)")
+            return EXIT_MISSING_DEPENDENCIES
+        downloader = MinGWDownloader()
+        downloader.run()
+        return EXIT_OK
+
+    if requests is None:
+        print(f"Missing dependencies: requests. Run: python {os.path.basename(sys.argv[0])} --bootstrap", file=sys.stderr)
+        return EXIT_MISSING_DEPENDENCIES
+    try:
+        code, result = run_command(args)
+    except (ProvisionError, requests.RequestException, OSError, ValueError) as e:
+        code, result = EXIT_FAILED, {'status': 'failed', 'error': str(e)}
+        if not args.json:
+            print(f"Error: {str(e)}", file=sys.stderr)
+            return code
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_result(args.command, result)
+    return code
 
 
 if __name__ == "__main__":
-    downloader = MinGWDownloader()
-    downloader.run()
+    sys.exit(main())
 
 # TODO: Implement internationalization support for multi-language UI
 # TODO: Adicionar suporte à internacionalização para interface em múltiplos idiomas
@@ -0,0 +1,35 @@
+import main
+
+SYSTEM_64 = {'arch': 'x86_64', 'bits': '64', 'os': 'win32'}
+ASSET = 'x86_64-13.2.0-release-posix-seh-ucrt-rt_v11-rev1.7z'
+
+
+def make_asset(filename, date='2024-01-01'):
+    return {'version': 'v1', 'filename': filename, 'date': date, 'url': f"https://example.invalid/{filename}",
+            'size': 1}
+
+
+def test_asset_record_parses_filename_fields():
+    record = main.AssetRecord(make_asset(ASSET), SYSTEM_64)
+    assert (record.arch, record.gcc_version, record.gcc_major) == ('x86_64', '13.2.0', '13')
+    assert (record.threads, record.exceptions, record.crt) == ('posix', 'seh', 'ucrt')
+    assert (record.runtime, record.revision) == ('rt_v11', 1)
+    assert record.compatible
+
+
+def test_asset_record_defaults_old_names_to_msvcrt():
+    record = main.AssetRecord(make_asset('i686-8.1.0-release-win32-dwarf-rt_v6-rev0.7z'), SYSTEM_64)
+    assert record.crt == 'msvcrt'
+    assert record.revision == 0
+    assert not record.compatible
+
+
+def test_asset_index_query_breaks_ties_by_filename():
+    index = main.AssetIndex(SYSTEM_64)
+    names = [f"{arch}-13.2.0-release-posix-{exc}-ucrt-rt_v11-rev1.7z" for arch, exc in (('i686', 'dwarf'),
+                                                                                        ('x86_64', 'seh'))]
+    for name in names:
+        index.add(make_asset(name))
+    assert [record.filename for record in index.query(crt='ucrt')] == sorted(names, reverse=True)
+    newest = main.AssetIndex.newest_per_major(index.query(gcc_major='13'))
+    assert newest['13'].filename == max(names)
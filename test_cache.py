@@ -0,0 +1,51 @@
+import os
+
+import main
+
+
+def ingest(cache, name, size=100):
+    path = cache.incoming_path(name)
+    with open(path, 'wb') as f:
+        f.write(name.encode('utf-8') * (size // len(name)) + b'x' * (size % len(name)))
+    return cache.ingest(path, name)
+
+
+def test_archives_are_content_addressed(tmp_path):
+    cache = main.ArchiveCache(str(tmp_path))
+    path = ingest(cache, 'a.7z')
+    assert path == cache.object_path('a.7z', main.file_sha256(path))
+    assert cache.path_for('a.7z') == path
+    assert not os.listdir(cache.incoming_dir)
+
+    reopened = main.ArchiveCache(str(tmp_path))
+    assert reopened.get('a.7z')['sha256'] == cache.get('a.7z')['sha256']
+
+
+def test_least_recently_used_archives_are_evicted_first(tmp_path):
+    cache = main.ArchiveCache(str(tmp_path), budget_bytes=250)
+    ingest(cache, 'a.7z')
+    ingest(cache, 'b.7z')
+    cache.entries['a.7z']['last_used'] += 10
+    ingest(cache, 'c.7z')
+    assert sorted(cache.entries) == ['a.7z', 'c.7z']
+    assert not cache.contains('b.7z')
+
+
+def test_pinned_archives_are_never_evicted(tmp_path):
+    cache = main.ArchiveCache(str(tmp_path), budget_bytes=150)
+    ingest(cache, 'a.7z')
+    cache.pin('a.7z')
+    ingest(cache, 'b.7z')
+    assert sorted(cache.entries) == ['a.7z', 'b.7z']
+    cache.unpin('a.7z')
+    ingest(cache, 'c.7z')
+    assert sorted(cache.entries) == ['c.7z']
+
+
+def test_default_cache_dir_is_per_user(tmp_path, monkeypatch):
+    monkeypatch.setenv('LOCALAPPDATA', str(tmp_path / 'local'))
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'local'))
+    settings = dict(main.load_settings(), cache_dir='', install_root=str(tmp_path / 'root'), trace_file='')
+    manager = main.ToolchainManager(settings, log=lambda message: None)
+    assert manager.download_folder == os.path.join(str(tmp_path / 'local'), 'mingw-downloader')
+    assert os.path.dirname(manager.release_cache.path) == manager.download_folder
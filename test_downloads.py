@@ -0,0 +1,92 @@
+import os
+
+import benchmark
+import main
+
+ASSET = 'x86_64-13.2.0-release-posix-seh-ucrt-rt_v11-rev1.7z'
+
+
+class SigningHandler(benchmark.BenchmarkHandler):
+    # /assets/<name> redirects to /signed/<generation>/<name>, like GitHub's
+    # release downloads. server.expire() invalidates every URL handed out so far.
+    def do_GET(self):
+        parts = self.path.split('/')
+        if self.path.startswith('/assets/'):
+            self.send_response(302)
+            self.send_header('Location', f"/signed/{self.server.generation}/{parts[2]}")
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif self.path.startswith('/signed/'):
+            with self.server.lock:
+                self.server.signed_requests += 1
+                fresh = int(parts[2]) == self.server.generation
+            if fresh:
+                self.send_asset(parts[3])
+            else:
+                self.send_error(403)
+        else:
+            self.send_error(404)
+
+
+def start_signing_server(server, assets):
+    instance = server(assets)
+    instance.RequestHandlerClass = SigningHandler
+    instance.generation = 0
+    instance.signed_requests = 0
+    return instance
+
+
+def test_download_resumes_from_journal(server, tmp_path):
+    data = os.urandom(2 * 1024 * 1024)
+    instance = server({ASSET: data})
+    url = f"{instance.base_url}/assets/{ASSET}"
+    file_path = str(tmp_path / ASSET)
+    downloader = main.SegmentedDownloader(main.create_session(), segments=4, min_segment_size=256 * 1024)
+
+    # Leave the first segment complete on disk, as an interrupted run would.
+    ranges = downloader._plan_ranges(len(data))
+    with open(file_path + '.part', 'wb') as f:
+        f.write(data[:ranges[0][1] + 1])
+        f.truncate(len(data))
+    ranges[0][2] = ranges[0][1] + 1
+    main.DownloadJournal(file_path + '.part.json', url, len(data), ranges).save(force=True)
+
+    downloader.download(url, file_path)
+    assert instance.request_count == 1 + len(ranges) - 1
+    with open(file_path, 'rb') as f:
+        assert f.read() == data
+    assert not os.path.exists(file_path + '.part.json')
+
+
+def test_download_falls_back_to_a_single_stream(server, tmp_path):
+    data = os.urandom(300 * 1024)
+    instance = server({ASSET: data}, ranges=False)
+    file_path = str(tmp_path / ASSET)
+    main.SegmentedDownloader(main.create_session()).download(f"{instance.base_url}/assets/{ASSET}", file_path)
+    with open(file_path, 'rb') as f:
+        assert f.read() == data
+
+
+def test_expired_signed_url_is_resolved_again(server, tmp_path):
+    data = os.urandom(1024 * 1024)
+    instance = start_signing_server(server, {ASSET: data})
+    file_path = str(tmp_path / ASSET)
+    downloader = main.SegmentedDownloader(main.create_session(), segments=4, min_segment_size=256 * 1024)
+
+    # The URL from the first probe expires before any segment uses it.
+    probe = downloader._probe
+    probes = []
+
+    def probe_and_expire_once(url):
+        result = probe(url)
+        probes.append(result[1])
+        if len(probes) == 1:
+            with instance.lock:
+                instance.generation += 1
+        return result
+    downloader._probe = probe_and_expire_once
+    downloader.download(f"{instance.base_url}/assets/{ASSET}", file_path)
+
+    assert len(probes) == 2 and probes[0] != probes[1]
+    with open(file_path, 'rb') as f:
+        assert f.read() == data
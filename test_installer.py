@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+import main
+
+TOOLCHAIN_A = {'bin/gcc.exe': b'gcc-13' * 100, 'include/stdio.h': b'header' * 100}
+TOOLCHAIN_B = {'bin/gcc.exe': b'gcc-14' * 100, 'include/stdio.h': b'header' * 100}
+
+
+def make_installer(tmp_path, **options):
+    return main.MinGWInstaller(str(tmp_path / 'root'), extractor='py7zr', log=lambda message: None, **options)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_delta_upgrade_links_unchanged_files(tmp_path, make_toolchain):
+    installer = make_installer(tmp_path)
+    installer.install(make_toolchain('a', TOOLCHAIN_A))
+    installer.install(make_toolchain('b', TOOLCHAIN_B))
+
+    assert installer.active_version() == 'b'
+    header_a = os.path.join(installer.version_dir('a'), 'include', 'stdio.h')
+    header_b = os.path.join(installer.version_dir('b'), 'include', 'stdio.h')
+    assert os.path.samefile(header_a, header_b)
+    assert read(os.path.join(installer.target_dir, 'bin', 'gcc.exe')) == TOOLCHAIN_B['bin/gcc.exe']
+    assert read(os.path.join(installer.version_dir('a'), 'bin', 'gcc.exe')) == TOOLCHAIN_A['bin/gcc.exe']
+    assert set(installer.read_manifest('b')) == set(TOOLCHAIN_B)
+
+
+def test_store_links_identical_files_across_versions(tmp_path, make_toolchain):
+    installer = make_installer(tmp_path, dedupe_store=True)
+    installer.install(make_toolchain('a', TOOLCHAIN_A))
+    installer.install(make_toolchain('b', TOOLCHAIN_B))
+
+    header_a = os.path.join(installer.version_dir('a'), 'include', 'stdio.h')
+    header_b = os.path.join(installer.version_dir('b'), 'include', 'stdio.h')
+    assert os.path.samefile(header_a, header_b)
+    assert os.stat(header_b).st_nlink == 3
+    assert not os.path.samefile(os.path.join(installer.version_dir('a'), 'bin', 'gcc.exe'),
+                                os.path.join(installer.version_dir('b'), 'bin', 'gcc.exe'))
+    sha256 = installer.read_manifest('b')['include/stdio.h'][2]
+    assert os.path.samefile(installer.store.path(sha256), header_b)
+
+
+def test_store_never_aliases_files_with_equal_header_metadata(tmp_path, make_toolchain, monkeypatch):
+    # Same path and size and (forced) the same CRC32, but different bytes.
+    manifest_entries = main.MinGWInstaller.manifest_entries
+
+    def colliding_entries(entries):
+        top, dirs, files = manifest_entries(entries)
+        for info in files.values():
+            info['crc'] = 0
+        return top, dirs, files
+    monkeypatch.setattr(main.MinGWInstaller, 'manifest_entries', staticmethod(colliding_entries))
+
+    installer = make_installer(tmp_path, dedupe_store=True)
+    installer.install(make_toolchain('a', TOOLCHAIN_A))
+    installer.install(make_toolchain('b', TOOLCHAIN_B))
+    assert read(os.path.join(installer.version_dir('a'), 'bin', 'gcc.exe')) == TOOLCHAIN_A['bin/gcc.exe']
+    assert read(os.path.join(installer.version_dir('b'), 'bin', 'gcc.exe')) == TOOLCHAIN_B['bin/gcc.exe']
+
+
+def test_removing_a_version_frees_only_unshared_objects(tmp_path, make_toolchain):
+    installer = make_installer(tmp_path, dedupe_store=True)
+    installer.install(make_toolchain('a', TOOLCHAIN_A))
+    installer.install(make_toolchain('b', TOOLCHAIN_B))
+
+    with pytest.raises(ValueError):
+        installer.remove_version('b')
+    assert installer.remove_version('a') == len(TOOLCHAIN_A['bin/gcc.exe'])
+    header_b = os.path.join(installer.version_dir('b'), 'include', 'stdio.h')
+    assert os.stat(header_b).st_nlink == 2
+    assert installer.collect_garbage() == 0
+    assert not installer.is_installed('a')
@@ -0,0 +1,62 @@
+import hashlib
+import os
+
+import pytest
+
+import main
+
+ASSET = 'x86_64-13.2.0-release-posix-seh-ucrt-rt_v11-rev1.7z'
+
+
+def test_ordered_digest_hashes_out_of_order_writes(tmp_path):
+    data = os.urandom(300000)
+    path = str(tmp_path / 'file.part')
+    with open(path, 'wb') as f:
+        f.write(data)
+    digest = main.OrderedDigest(path, block_size=4096)
+    digest.update(200000, data[200000:])
+    digest.mark(100000, 200000)
+    digest.update(0, data[:100000])
+    assert digest.hexdigest(len(data)) == hashlib.sha256(data).hexdigest()
+
+
+def test_ordered_digest_rejects_gaps(tmp_path):
+    path = str(tmp_path / 'file.part')
+    with open(path, 'wb') as f:
+        f.write(b'\0' * 20)
+    digest = main.OrderedDigest(path)
+    digest.update(10, b'x' * 10)
+    with pytest.raises(main.DownloadError):
+        digest.hexdigest(20)
+
+
+def test_download_rejects_checksum_mismatch(server, tmp_path):
+    instance = server({ASSET: b'payload' * 1000}, ranges=False)
+    file_path = str(tmp_path / ASSET)
+    downloader = main.SegmentedDownloader(main.create_session())
+    with pytest.raises(main.DownloadError):
+        downloader.download(f"{instance.base_url}/assets/{ASSET}", file_path, sha256='0' * 64)
+    assert not os.path.exists(file_path)
+    assert not os.path.exists(file_path + '.part')
+
+
+def test_cached_archives_are_rehashed_only_after_they_change(tmp_path, monkeypatch):
+    cache = main.ArchiveCache(str(tmp_path))
+    path = cache.incoming_path(ASSET)
+    with open(path, 'wb') as f:
+        f.write(b'archive' * 100)
+    path = cache.ingest(path, ASSET)
+
+    hashed = []
+    file_sha256 = main.file_sha256
+    monkeypatch.setattr(main, 'file_sha256', lambda p: hashed.append(p) or file_sha256(p))
+    assert cache.verify(ASSET) == path
+    assert hashed == []
+
+    # Same size, different bytes and mtime: the digest no longer matches.
+    with open(path, 'r+b') as f:
+        f.write(b'ARCHIVE')
+    os.utime(path, ns=(0, 0))
+    assert cache.verify(ASSET) is None
+    assert hashed == [path]
+    assert not cache.contains(ASSET)
@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+
+import pytest
+import requests
+
+import main
+
+ASSET = 'x86_64-13.2.0-release-posix-seh-ucrt-rt_v11-rev1.7z'
+
+
+def make_manager(tmp_path, name, api_url, mirror_url=''):
+    settings = dict(main.load_settings(), cache_dir=str(tmp_path / name / 'cache'),
+                    install_root=str(tmp_path / name / 'root'), trace_file='', mirror_url=mirror_url)
+    return main.ToolchainManager(settings, log=lambda message: None, api_url=api_url)
+
+
+@pytest.fixture
+def mirror(server, tmp_path):
+    data = os.urandom(512 * 1024)
+    upstream = server({ASSET: data}, pages=2)
+    manager = make_manager(tmp_path, 'mirror', upstream.api_url)
+    instance = main.MirrorServer(manager, ('127.0.0.1', 0))
+    instance.refresh_index()
+    threading.Thread(target=instance.serve_forever, daemon=True).start()
+    instance.base_url = f"http://127.0.0.1:{instance.server_address[1]}"
+    instance.upstream, instance.data = upstream, data
+    yield instance
+    instance.shutdown()
+    instance.server_close()
+
+
+def wait_for_fetch(instance):
+    for thread in list(instance.fetching.values()):
+        thread.join(10)
+
+
+def test_mirror_serves_the_release_index_before_index_ttl(mirror):
+    response = requests.get(f"{mirror.base_url}/releases?per_page=5")
+    assert response.status_code == 200
+    assert 'next' in response.links
+    assert any(asset['name'] == ASSET for release in response.json() for asset in release['assets'])
+    again = requests.get(f"{mirror.base_url}/releases?per_page=5", headers={'If-None-Match': response.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_mirror_fetches_once_then_serves_ranges(mirror):
+    url = f"{mirror.base_url}/assets/{ASSET}"
+    first = requests.get(url)
+    assert first.status_code == 503 and first.headers['Retry-After']
+    wait_for_fetch(mirror)
+    upstream_requests = mirror.upstream.request_count
+
+    partial = requests.get(url, headers={'Range': 'bytes=100-199'})
+    assert partial.status_code == 206
+    assert partial.headers['Content-Range'] == f"bytes 100-199/{len(mirror.data)}"
+    assert partial.content == mirror.data[100:200]
+    assert requests.get(url, headers={'Range': 'bytes=-10'}).content == mirror.data[-10:]
+    assert requests.head(url).headers['Content-Length'] == str(len(mirror.data))
+    assert mirror.upstream.request_count == upstream_requests
+
+
+def test_client_downloads_through_the_mirror(mirror, tmp_path):
+    requests.get(f"{mirror.base_url}/assets/{ASSET}")
+    wait_for_fetch(mirror)
+    client = make_manager(tmp_path, 'client', mirror.upstream.api_url, mirror_url=mirror.base_url)
+    client.load_index()
+    upstream_requests = mirror.upstream.request_count
+    path = client.download(ASSET, client.assets.get(ASSET).url)
+    with open(path, 'rb') as f:
+        assert f.read() == mirror.data
+    assert mirror.upstream.request_count == upstream_requests
+
+
+def test_failed_upstream_fetch_sends_clients_to_github(mirror, tmp_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise main.DownloadError("upstream unreachable")
+    monkeypatch.setattr(mirror.manager, 'download', fail)
+    assert mirror.start_fetch(ASSET) == 'fetching'
+    wait_for_fetch(mirror)
+    assert requests.get(f"{mirror.base_url}/assets/{ASSET}").status_code == 502
+    assert mirror.start_fetch(ASSET) == 'failed'
+
+    client = make_manager(tmp_path, 'client', mirror.upstream.api_url, mirror_url=mirror.base_url)
+    client.load_index()
+    started = time.monotonic()
+    path = client.download(ASSET, client.assets.get(ASSET).url)
+    assert time.monotonic() - started < 5
+    with open(path, 'rb') as f:
+        assert f.read() == mirror.data
+
+
+def test_client_ignores_a_mirror_without_releases(server, tmp_path):
+    upstream = server({ASSET: b'archive'})
+    empty = server({}, releases_per_page=0)
+    client = make_manager(tmp_path, 'client', upstream.api_url,
+                          mirror_url=empty.api_url[:-len('/releases')])
+    assets, _ = client.fetch_releases()
+    assert ASSET in {asset['filename'] for asset in assets}
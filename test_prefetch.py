@@ -0,0 +1,36 @@
+import os
+import threading
+
+import main
+
+ASSET = 'x86_64-13.2.0-release-posix-seh-ucrt-rt_v11-rev1.7z'
+
+
+def test_paused_prefetch_closes_ranges_and_resumes_without_retries(server, tmp_path):
+    data = os.urandom(2 * 1024 * 1024)
+    instance = server({ASSET: data})
+    paused = threading.Event()
+    throttle = main.BackgroundThrottle(0, paused=paused.is_set, promoted=lambda: False, poll=0.05)
+    downloader = main.SegmentedDownloader(main.create_session(), segments=4, min_segment_size=256 * 1024,
+                                          chunk_size=64 * 1024, retries=0, throttle=throttle)
+
+    def progress(done, total):
+        # A user download starts a quarter of the way in and ends shortly after.
+        if done >= total // 4 and not paused.is_set() and not progress.fired:
+            progress.fired = True
+            paused.set()
+            threading.Timer(0.3, paused.clear).start()
+    progress.fired = False
+
+    file_path = str(tmp_path / ASSET)
+    downloader.download(f"{instance.base_url}/assets/{ASSET}", file_path, progress=progress)
+    with open(file_path, 'rb') as f:
+        assert f.read() == data
+    # Every segment that was interrupted was requested again from where it stopped.
+    assert instance.request_count > 1 + 4
+
+
+def test_promoted_prefetch_ignores_pause_and_own_cap():
+    throttle = main.BackgroundThrottle(1, paused=lambda: True, promoted=lambda: True)
+    assert not throttle.held()
+    throttle.consume(10 * 1024 * 1024)
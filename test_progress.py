@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+import main
+
+ASSET = 'x86_64-13.2.0-release-posix-seh-ucrt-rt_v11-rev1.7z'
+
+
+def test_publishes_are_coalesced_into_one_snapshot_per_frame():
+    bus = main.ProgressBus()
+    frames = []
+    bus.subscribe(frames.append)
+    bus.start('a', 'Downloading a', 1000)
+    for done in range(0, 1001, 10):
+        bus.publish('a', done)
+    bus.publish('missing', 5)
+
+    assert len(bus.pump()) == 1
+    assert [(snap.task_id, snap.done) for snap in frames[0]] == [('a', 1000)]
+    assert bus.pump() == [] and len(frames) == 1
+
+
+def test_rate_and_eta_are_smoothed():
+    bus = main.ProgressBus(smoothing=0.5)
+    bus.start('a', 'Downloading a', 1000)
+    bus.tasks['a'].last_time -= 1.0
+    bus.publish('a', 100)
+    snap, = bus.pump()
+    assert snap.rate == pytest.approx(100, rel=0.05)
+    assert snap.eta == pytest.approx(9, rel=0.05)
+
+    bus.tasks['a'].last_time -= 1.0
+    bus.publish('a', 400)
+    snap, = bus.pump()
+    assert snap.rate == pytest.approx(300, rel=0.05)
+    assert snap.avg_rate == pytest.approx(200, rel=0.05)
+    assert snap.eta == pytest.approx(3, rel=0.05)
+
+
+def test_finished_tasks_are_reported_once_and_dropped():
+    bus = main.ProgressBus()
+    bus.start('a', 'Extracting a')
+    bus.finish('a')
+    snap, = bus.pump()
+    assert snap.finished and snap.eta is None
+    assert 'a' not in bus.tasks
+    bus.publish('a', 10)
+    assert bus.pump() == []
+
+
+def test_provision_reports_downloads_on_the_managers_bus(server, tmp_path):
+    data = os.urandom(256 * 1024)
+    instance = server({ASSET: data})
+    settings = dict(main.load_settings(), cache_dir=str(tmp_path / 'cache'), install_root=str(tmp_path / 'root'))
+    bus = main.ProgressBus()
+    manager = main.ToolchainManager(settings, log=lambda message: None, progress_bus=bus)
+    entry = {'asset': ASSET, 'url': f"{instance.base_url}/assets/{ASSET}", 'install': False}
+    snapshots = []
+    bus.subscribe(snapshots.extend)
+
+    result, = manager.provision([entry], refresh=False)
+    bus.pump()
+    assert result['status'] == 'ok'
+    assert {snap.label for snap in snapshots} == {f"Downloading {ASSET}"}
+    assert snapshots[-1].finished and snapshots[-1].done == len(data)
+
+    # Nothing to report once the archive is cached.
+    manager.provision([entry], refresh=False)
+    assert bus.pump() == []
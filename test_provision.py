@@ -0,0 +1,50 @@
+import json
+import os
+
+import main
+
+ASSET = 'x86_64-13.2.0-release-posix-seh-ucrt-rt_v11-rev1.7z'
+SYSTEM_64 = {'arch': 'x86_64', 'bits': '64', 'os': 'win32'}
+
+
+def make_manager(tmp_path, api_url):
+    settings = dict(main.load_settings(), cache_dir=str(tmp_path / 'cache'), install_root=str(tmp_path / 'root'))
+    manager = main.ToolchainManager(settings, log=lambda message: None, api_url=api_url)
+    manager.system_info = SYSTEM_64
+    manager.assets = main.AssetIndex(SYSTEM_64)
+    return manager
+
+
+def test_manifest_defaults_apply_to_every_entry(tmp_path):
+    path = tmp_path / 'toolchains.json'
+    path.write_text(json.dumps({'defaults': {'threads': 'posix', 'verify': True},
+                                'toolchains': [{'gcc_major': 13}, {'gcc_major': 14, 'verify': False}]}))
+    assert main.load_manifest(str(path)) == [{'threads': 'posix', 'verify': True, 'gcc_major': 13},
+                                             {'threads': 'posix', 'verify': False, 'gcc_major': 14}]
+
+
+def test_resolve_prefers_compatible_builds(tmp_path):
+    manager = make_manager(tmp_path, 'https://example.invalid/releases')
+    for name in ('i686-13.2.0-release-posix-dwarf-ucrt-rt_v11-rev1.7z', ASSET):
+        manager.assets.add({'version': 'v1', 'filename': name, 'date': '2024-01-01',
+                            'url': f"https://example.invalid/{name}", 'size': 1})
+    assert manager.resolve({'threads': 'posix', 'gcc_major': 13})['asset'] == ASSET
+    assert manager.resolve({'arch': 'i686'})['asset'].startswith('i686-')
+
+
+def test_lockfile_pins_digests_and_provisions_without_the_api(server, tmp_path):
+    data = os.urandom(64 * 1024)
+    instance = server({ASSET: data})
+    manager = make_manager(tmp_path, instance.api_url)
+    manager.load_index()
+    locked, = manager.lock_entries([{'gcc_major': 13, 'install': False}])
+    assert locked['asset'] == ASSET and locked['size'] == len(data)
+
+    # The build agent cannot reach the API; pinned entries do not need it.
+    agent = make_manager(tmp_path / 'agent', 'http://127.0.0.1:9/releases')
+    results = agent.provision(
+        [{'asset': 'missing.7z', 'url': f"{instance.base_url}/assets/missing.7z", 'install': False}, locked])
+    assert [(result['asset'], result['status']) for result in results] == [('missing.7z', 'failed'), (ASSET, 'ok')]
+    with open(results[1]['path'], 'rb') as f:
+        assert f.read() == data
+    assert agent.archive_cache.get(ASSET)['sha256'] == locked['sha256']
@@ -0,0 +1,36 @@
+import main
+
+
+def make_client(tmp_path):
+    cache = main.ReleaseIndexCache(str(tmp_path / 'mingw_releases.json'))
+    return main.ReleaseClient(main.create_session(), cache)
+
+
+def test_unchanged_index_is_revalidated_with_a_304(server, tmp_path):
+    instance = server({'a.7z': b'archive'})
+    assets, not_modified = make_client(tmp_path).fetch(instance.api_url)
+    assert not not_modified
+    assert 'a.7z' in {asset['filename'] for asset in assets}
+
+    # A later run sends the persisted ETag and reuses the cached assets.
+    reopened = make_client(tmp_path)
+    assert reopened.cached_assets(instance.api_url) == assets
+    again, not_modified = reopened.fetch(instance.api_url)
+    assert not_modified and again == assets
+    assert instance.request_count == 2
+
+
+def test_every_page_is_fetched_and_kept_in_order(server, tmp_path):
+    instance = server({'a.7z': b'archive'}, pages=4, releases_per_page=3)
+    client = make_client(tmp_path)
+    pages = []
+    assets, _ = client.fetch(instance.api_url, on_page=pages.append)
+
+    expected = [asset for page in range(1, 5)
+                for asset in main.ReleaseClient.parse_releases(instance.release_page(page))]
+    assert [asset['filename'] for asset in assets] == [asset['filename'] for asset in expected]
+    # on_page sees each page once, in whatever order the pages arrive.
+    assert len(pages) == 4
+    assert sorted(asset['filename'] for page in pages for asset in page) == sorted(asset['filename'] for asset in assets)
+    assert instance.request_count == 4
+    assert client.cached_assets(instance.api_url) == assets
@@ -0,0 +1,55 @@
+import threading
+import time
+
+import main
+
+
+def wait_all(*jobs):
+    for job in jobs:
+        assert job.done.wait(5)
+
+
+def test_scheduler_deduplicates_unfinished_jobs():
+    release = threading.Event()
+    scheduler = main.JobScheduler({'download': 1})
+    first = scheduler.submit('download:a', 'download', release.wait)
+    second = scheduler.submit('download:a', 'download', lambda: None, main.JobScheduler.PRIORITY_USER)
+    assert first is second
+    assert first.priority == main.JobScheduler.PRIORITY_USER
+    release.set()
+    wait_all(first)
+    assert scheduler.submit('download:a', 'download', lambda: None) is not first
+
+
+def test_scheduler_runs_higher_priority_first():
+    release = threading.Event()
+    order = []
+    scheduler = main.JobScheduler({'download': 1})
+    blocker = scheduler.submit('download:blocker', 'download', release.wait)
+    low = scheduler.submit('download:low', 'download', lambda: order.append('low'),
+                           main.JobScheduler.PRIORITY_BACKGROUND)
+    high = scheduler.submit('download:high', 'download', lambda: order.append('high'),
+                            main.JobScheduler.PRIORITY_USER)
+    assert low.state == high.state == 'queued'
+    release.set()
+    wait_all(blocker, low, high)
+    assert order == ['high', 'low']
+
+
+def test_scheduler_cancels_dependents_of_failed_jobs():
+    def fail():
+        raise main.DownloadError("boom")
+    scheduler = main.JobScheduler({'download': 1, 'install': 1})
+    download = scheduler.submit('download:a', 'download', fail)
+    install = scheduler.submit('install:a', 'install', lambda: None, depends=(download,))
+    wait_all(download, install)
+    assert (download.state, download.error) == ('failed', 'boom')
+    assert install.state == 'cancelled'
+
+
+def test_token_bucket_holds_callers_to_the_rate():
+    bucket = main.TokenBucket(1024 * 1024, burst=64 * 1024)
+    started = time.monotonic()
+    for _ in range(8):
+        bucket.consume(64 * 1024)
+    assert time.monotonic() - started >= 0.4
@@ -0,0 +1,61 @@
+import json
+import threading
+
+import main
+
+
+def read_spans(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_spans_nest_per_thread_and_export_on_completion(tmp_path):
+    messages = []
+    tracer = main.Tracer(str(tmp_path / 'trace.jsonl'), log=messages.append)
+    with tracer.span('install', version='v1'):
+        with tracer.span('install.extract') as extract:
+            assert tracer.current() is extract
+        parent = tracer.current()
+
+        def hash_files():
+            with tracer.span('install.hash', parent):
+                pass
+        worker = threading.Thread(target=hash_files)
+        worker.start()
+        worker.join()
+        assert not (tmp_path / 'trace.jsonl').exists()
+    assert tracer.current() is None
+
+    spans = {span['name']: span for span in read_spans(tmp_path / 'trace.jsonl')}
+    assert set(spans) == {'install', 'install.extract', 'install.hash'}
+    assert len({span['operation'] for span in spans.values()}) == 1
+    assert spans['install']['parent'] is None
+    assert spans['install.extract']['parent'] == spans['install']['span']
+    assert spans['install.hash']['parent'] == spans['install']['span']
+    assert spans['install']['attributes'] == {'version': 'v1'}
+
+    assert len(messages) == 1
+    assert messages[0].startswith('Trace ') and 'install.extract' in messages[0]
+
+
+def test_failed_spans_record_the_error():
+    messages = []
+    tracer = main.Tracer(log=messages.append)
+    try:
+        with tracer.span('download'):
+            raise main.DownloadError('boom')
+    except main.DownloadError:
+        pass
+    assert 'FAILED (DownloadError: boom)' in messages[0]
+
+
+def test_trace_file_rolls_over_at_max_bytes(tmp_path):
+    path = tmp_path / 'trace.jsonl'
+    tracer = main.Tracer(str(path), max_bytes=1024)
+    for index in range(50):
+        with tracer.span('fetch', page=index):
+            pass
+    assert path.stat().st_size < 2048
+    assert (tmp_path / 'trace.jsonl.1').exists()
+    assert not (tmp_path / 'trace.jsonl.2').exists()
+    assert read_spans(path)[-1]['attributes'] == {'page': 49}
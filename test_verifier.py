@@ -0,0 +1,59 @@
+import os
+import shutil
+
+import pytest
+
+import main
+
+TOOLS = {tool: shutil.which(tool) for tool in ('gcc', 'g++', 'make')}
+pytestmark = pytest.mark.skipif(os.name == 'nt' or not all(TOOLS.values()),
+                                reason="needs gcc, g++ and make on a POSIX host")
+
+
+@pytest.fixture
+def verifier(tmp_path):
+    # An installed version whose bin/ points at the host's compilers.
+    installer = main.MinGWInstaller(str(tmp_path / 'root'), log=lambda message: None)
+    bin_dir = os.path.join(installer.version_dir('v1'), 'bin')
+    os.makedirs(bin_dir)
+    for tool, path in TOOLS.items():
+        os.symlink(path, os.path.join(bin_dir, tool))
+    with open(installer.manifest_path('v1'), 'w', encoding='utf-8') as f:
+        f.write('{"files": {}}')
+    instance = main.ToolchainVerifier(installer, log=lambda message: None)
+    runs = []
+    run = instance._run
+    instance._run = lambda name, args, cwd: runs.append(args) or run(name, args, cwd)
+    instance.runs = runs
+    return instance
+
+
+def test_passing_verification_is_cached_until_a_tool_changes(verifier):
+    first = verifier.verify('v1')
+    assert first['ok'] and not first['cached']
+    assert not first['checks']['gdb']['ok'] and first['checks']['smoke_cpp']['ok']
+
+    runs = len(verifier.runs)
+    second = verifier.verify('v1')
+    assert second['cached'] and second['checks'] == first['checks']
+    assert len(verifier.runs) == runs
+
+    make_path = verifier.tool_path('v1', 'make')
+    os.remove(make_path)
+    shutil.copy2(TOOLS['make'], make_path)
+    os.utime(make_path, ns=(0, 0))
+    assert not verifier.verify('v1')['cached']
+    assert verifier.verify('v1')['cached']
+    assert not verifier.verify('v1', force=True)['cached']
+
+
+def test_failed_verification_is_never_cached(verifier):
+    os.remove(verifier.tool_path('v1', 'g++'))
+    first = verifier.verify('v1')
+    assert not first['ok'] and not first['checks']['smoke_cpp']['ok']
+    assert not verifier.verify('v1')['cached']
+
+
+def test_unknown_version_is_an_error(verifier):
+    with pytest.raises(main.ProvisionError):
+        verifier.verify('v2')
@@ -0,0 +1,24 @@
+import main
+
+
+def make_model(*names):
+    model = main.VersionTableModel()
+    for index, name in enumerate(names):
+        model.add(main.VersionRow('v1', name, 'Not Downloaded', '2024-01-01', ''), f"I{index}")
+    return model
+
+
+def test_set_query_narrows_and_widens():
+    model = make_model('x86_64-13.2.0-posix.7z', 'x86_64-14.1.0-posix.7z', 'i686-13.2.0-win32.7z')
+    assert model.set_query('13') == (['x86_64-14.1.0-posix.7z'], [])
+    to_hide, to_show = model.set_query('13.2.0-P')
+    assert to_hide == ['i686-13.2.0-win32.7z'] and to_show == []
+    to_hide, to_show = model.set_query('')
+    assert to_hide == [] and sorted(to_show) == ['i686-13.2.0-win32.7z', 'x86_64-14.1.0-posix.7z']
+    assert model.visible_order() == list(model.order)
+
+
+def test_set_query_replaced_rechecks_every_row():
+    model = make_model('a-posix.7z', 'b-win32.7z')
+    model.set_query('posix')
+    assert model.set_query('win32') == (['a-posix.7z'], ['b-win32.7z'])
@@ -0,0 +1,64 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import main
+
+
+class FakeApp:
+    def __init__(self, folder):
+        self.download_folder = str(folder)
+        self.batches = []
+        self.adopted = threading.Event()
+
+    def _adopt_loose_archives(self, filenames):
+        self.batches.append(filenames)
+        self.adopted.set()
+
+
+def event(event_type, path, dest_path=None):
+    return SimpleNamespace(event_type=event_type, src_path=str(path), dest_path=str(dest_path or ''),
+                           is_directory=False)
+
+
+def test_events_are_filtered_and_coalesced_into_one_batch(tmp_path):
+    app = FakeApp(tmp_path)
+    handler = main.DownloadFolderHandler(app, delay=0.1)
+    for name in ('a.7z', 'b.7z'):
+        (tmp_path / name).write_bytes(b'archive')
+    for _ in range(3):
+        handler.dispatch(event('modified', tmp_path / 'a.7z'))
+    handler.dispatch(event('created', tmp_path / 'b.7z'))
+    handler.dispatch(event('created', tmp_path / 'notes.txt'))
+    handler.dispatch(event('created', tmp_path / '~tmp.7z'))
+    handler.dispatch(event('created', tmp_path / 'incoming' / 'c.7z'))
+
+    assert app.adopted.wait(5)
+    time.sleep(0.3)
+    assert app.batches == [['a.7z', 'b.7z']]
+
+
+def test_archives_still_growing_are_held_back(tmp_path):
+    app = FakeApp(tmp_path)
+    handler = main.DownloadFolderHandler(app, delay=0.1)
+    path = tmp_path / 'a.7z'
+    path.write_bytes(b'part')
+    handler.dispatch(event('created', path))
+
+    # A copy that never sends another event but keeps growing between polls.
+    for chunk in range(20):
+        time.sleep(0.03)
+        with open(path, 'ab') as f:
+            f.write(b'more data %d' % chunk)
+    assert not app.batches
+
+    assert app.adopted.wait(5)
+    assert app.batches == [['a.7z']]
+
+
+def test_removed_archives_are_reported_at_once(tmp_path):
+    app = FakeApp(tmp_path)
+    handler = main.DownloadFolderHandler(app, delay=0.05)
+    handler.dispatch(event('moved', tmp_path / 'old.7z', tmp_path / 'sub' / 'new.7z'))
+    assert app.adopted.wait(5)
+    assert app.batches == [['old.7z']]